@@ -0,0 +1,32 @@
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from tools.embedding_worker import embedding_worker
+from tools.embeddings import close_embedder
+from tools.supabase_client import close_client
+
+
+async def backfill_embeddings():
+    """Tüm aktif ilanlar için product_embeddings'i doldur"""
+    
+    print("🧠 Embedding backfill")
+    print("=" * 60)
+    
+    await embedding_worker.start()
+    try:
+        total = await embedding_worker.backfill()
+        print(f"📦 {total} ilan kuyruğa alındı, işleniyor...")
+        await embedding_worker.stop(timeout=3600)
+    finally:
+        await close_embedder()
+        await close_client()
+    
+    stats = embedding_worker.stats()
+    print(f"✅ Upserted: {stats['upserted']}")
+    print(f"❌ Failed: {stats['failed']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_embeddings())
@@ -0,0 +1,58 @@
+import argparse
+import random
+import statistics
+import time
+
+from tools.category_classifier import NaiveBayesCategoryClassifier, set_classifier
+from tools.suggest_category import suggest_category_sync
+from train_category_model import DEFAULT_DATASET, load_dataset
+
+
+def evaluate(name, texts, labels):
+    """suggest_category_sync'i aktif scorer ile ölç: accuracy + çağrı başı latency"""
+    
+    correct = 0
+    timings = []
+    for text, label in zip(texts, labels):
+        start = time.perf_counter()
+        result = suggest_category_sync(text)
+        timings.append((time.perf_counter() - start) * 1e6)
+        if result["suggested_category"] == label:
+            correct += 1
+    
+    timings.sort()
+    print(f"{name:<10} accuracy={correct / len(texts):.3f}  "
+          f"mean={statistics.fmean(timings):.1f}µs  "
+          f"p50={timings[len(timings) // 2]:.1f}µs  "
+          f"p99={timings[int(len(timings) * 0.99)]:.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword scorer vs naive Bayes model")
+    parser.add_argument("dataset", nargs="?", default=DEFAULT_DATASET, help="JSONL from train_category_model.py")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    texts, labels = load_dataset(args.dataset)
+    rows = list(zip(texts, labels))
+    random.Random(args.seed).shuffle(rows)
+    split = int(len(rows) * (1 - args.holdout))
+    train, test = rows[:split], rows[split:]
+    
+    print(f"📊 {len(train)} train / {len(test)} test")
+    print("=" * 60)
+    
+    test_texts = [t for t, _ in test]
+    test_labels = [l for _, l in test]
+    
+    set_classifier(None)
+    evaluate("keyword", test_texts, test_labels)
+    
+    model = NaiveBayesCategoryClassifier.fit([t for t, _ in train], [l for _, l in train])
+    set_classifier(model)
+    evaluate("model", test_texts, test_labels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from server import orjson, tool_call_envelope
+
+
+CITIES = ["İstanbul", "Ankara", "İzmir", "Bursa", "Antalya"]
+CATEGORIES = ["Otomotiv", "Emlak", "Elektronik", "Ev & Yaşam", "Moda & Aksesuar"]
+
+
+def make_search_result(rows, seed=42):
+    """search_listings_tool'un döndürdüğü şekilde sentetik sonuç (detail view)"""
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    listings = []
+    for i in range(rows):
+        listings.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Satılık temiz {rng.choice(['iPhone 13', 'Passat 1.6 TDI', '3+1 daire', 'koltuk takımı'])} #{i}",
+            "description": "Az kullanılmış, kutusu ve faturası mevcut. Pazarlık payı vardır. " * 3,
+            "category": rng.choice(CATEGORIES),
+            "price": rng.randint(500, 2_000_000),
+            "condition": rng.choice(["new", "used"]),
+            "location": rng.choice(CITIES),
+            "status": "active",
+            "image_url": None,
+            "images": [f"https://cdn.example.com/{i}/{n}.jpg" for n in range(3)],
+            "metadata": {"brand": "Apple", "storage": "128GB", "room_count": "3+1"},
+            "stock": 1,
+            "view_count": rng.randint(0, 5000),
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "updated_at": now.isoformat(),
+        })
+    return {"success": True, "count": len(listings), "listings": listings, "next_cursor": None}
+
+
+def old_path(request_id, result):
+    """Önceki yol: json.dumps(result) → dict envelope → jsonable_encoder → JSONResponse.render"""
+
+    envelope = {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "result": {
+            "content": [
+                {"type": "text", "text": json.dumps(result, ensure_ascii=False)}
+            ]
+        }
+    }
+    return JSONResponse(jsonable_encoder(envelope)).body
+
+
+def measure(name, fn, result, iterations):
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        body = fn(i, result)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    print(f"{name:<10} bytes={len(body):<7} "
+          f"mean={statistics.fmean(timings):.1f}µs  "
+          f"p50={timings[len(timings) // 2]:.1f}µs  "
+          f"p99={timings[int(len(timings) * 0.99)]:.1f}µs")
+    return statistics.fmean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tools/call envelope serialization benchmark")
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    result = make_search_result(args.rows)
+    # Aynı payload'ı taşıdıklarını doğrula
+    assert json.loads(json.loads(old_path(1, result))["result"]["content"][0]["text"]) == \
+        json.loads(json.loads(tool_call_envelope(1, result))["result"]["content"][0]["text"])
+
+    print(f"📊 {args.rows}-row search result, {args.iterations} iterations "
+          f"(orjson: {'yes' if orjson is not None else 'no'})")
+    print("=" * 60)
+    old = measure("old", old_path, result, args.iterations)
+    new = measure("new", tool_call_envelope, result, args.iterations)
+    print(f"speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
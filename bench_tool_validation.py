@@ -0,0 +1,68 @@
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+from tools.registry import ToolArgumentError, tool_registry
+
+import tools.insert_listing  # noqa: F401  (registers insert_listing_tool)
+import tools.search_listings  # noqa: F401  (registers search_listings_tool)
+
+
+CASES = [
+    # (label, tool, arguments)
+    ("search clean", "search_listings_tool",
+     {"query": "iPhone 13", "category": "Elektronik", "location": "İstanbul", "max_price": 45000, "limit": 10}),
+    ("search coerce", "search_listings_tool",
+     {"query": "iPhone 13", "min_price": "20 bin", "max_price": "45.000", "limit": "10", "fuzzy": "true",
+      "session_id": "stray"}),
+    ("insert coerce", "insert_listing_tool",
+     {"title": "Passat 1.6 TDI", "price": "1.250.000 TL", "stock": "1", "condition": "used",
+      "metadata": {"type": "vehicle", "brand": "Volkswagen", "year": 2018}}),
+    ("search reject", "search_listings_tool",
+     {"query": "iPhone 13", "min_price": "ucuz", "sort": "best"}),
+]
+
+
+def validate(tool, arguments):
+    try:
+        return tool.validate(arguments)
+    except ToolArgumentError:
+        return None
+
+
+def measure(tool, arguments, iterations):
+    timings = []
+    # Bilinmeyen argüman uyarısı (print) ölçüme terminal I/O'su katmasın
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            start = time.perf_counter()
+            validate(tool, arguments)
+            timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tools/call argument validation/coercion benchmark")
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for label, name, arguments in CASES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = validate(tool_registry.get(name), arguments)
+        print(f"{label:<14} → {result if result is not None else 'rejected'}")
+
+    print(f"\n📊 Tool.validate, {args.iterations} iterations per case")
+    print("=" * 60)
+    for label, name, arguments in CASES:
+        timings = measure(tool_registry.get(name), arguments, args.iterations)
+        print(f"{label:<14} args={len(arguments):<3} "
+              f"mean={statistics.fmean(timings):.2f}µs  "
+              f"p50={timings[len(timings) // 2]:.2f}µs  "
+              f"p99={timings[int(len(timings) * 0.99)]:.2f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -344,7 +344,7 @@ $$ LANGUAGE plpgsql;
 -- ============================================================
 -- CREATE EXTENSION IF NOT EXISTS "uuid-ossp";     -- UUID generation
 -- CREATE EXTENSION IF NOT EXISTS "vector";         -- pgvector for embeddings
--- CREATE EXTENSION IF NOT EXISTS "pg_trgm";        -- Trigram similarity for fuzzy search
+-- CREATE EXTENSION IF NOT EXISTS "pg_trgm";        -- Trigram similarity for fuzzy search (enabled in search_schema.sql)
 
 
 -- ============================================================
@@ -0,0 +1,124 @@
+-- ============================================================
+-- PAZARGLOBAL - SEARCH SCHEMA
+-- Purpose: Indexes and functions backing search_listings / list_user_listings
+-- Run complete_schema.sql before this file
+-- ============================================================
+
+-- ============================================================
+-- KEYSET PAGINATION
+-- Tools order by (created_at DESC, id DESC) and page with a
+-- (created_at, id) < (cursor) filter instead of OFFSET
+-- ============================================================
+CREATE INDEX IF NOT EXISTS idx_listings_created_at_id
+    ON listings(created_at DESC, id DESC);
+
+-- list_user_listings: user_id filter + keyset order in one index
+CREATE INDEX IF NOT EXISTS idx_listings_user_created_at_id
+    ON listings(user_id, created_at DESC, id DESC);
+
+
+-- ============================================================
+-- FULL-TEXT SEARCH
+-- Combined weighted tsvector: title (A), category (B), description (C), location (D)
+-- search_listings (search_mode="auto"/"fts") filters with
+--   search_vector=wfts(turkish).<query>
+-- so a single GIN index scan replaces the or=(…ilike…) sequential scan.
+-- idx_listings_title_search / idx_listings_description_search can be
+-- dropped once this index is in place.
+-- ============================================================
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('turkish', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('turkish', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('turkish', coalesce(description, '')), 'C') ||
+        setweight(to_tsvector('turkish', coalesce(location, '')), 'D')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_listings_search_vector
+    ON listings USING gin(search_vector);
+
+-- Function: Ranked full-text search (search_listings sort="relevance")
+-- PostgREST applies the remaining filters (status, category, price, select, limit)
+-- on top of the returned rows: GET /rest/v1/rpc/search_listings_ranked?p_query=...
+CREATE OR REPLACE FUNCTION search_listings_ranked(p_query TEXT)
+RETURNS SETOF listings AS $$
+    SELECT l.*
+    FROM listings l
+    WHERE l.search_vector @@ websearch_to_tsquery('turkish', p_query)
+    ORDER BY ts_rank_cd(l.search_vector, websearch_to_tsquery('turkish', p_query)) DESC,
+             l.created_at DESC,
+             l.id DESC;
+$$ LANGUAGE sql STABLE;
+
+
+-- ============================================================
+-- FUZZY (TRIGRAM) SEARCH
+-- Typo-tolerant matching for search_listings(fuzzy=True):
+-- "otomativ" → "Otomotiv", "dublex" → "Dubleks"
+-- ============================================================
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_listings_title_trgm
+    ON listings USING gin(title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_listings_category_trgm
+    ON listings USING gin(category gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_listings_location_trgm
+    ON listings USING gin(location gin_trgm_ops);
+
+-- Function: Fuzzy search ranked by trigram word similarity
+-- `<%` is index-backed (gin_trgm_ops); threshold lowered from the 0.6 default
+-- so single-letter typos in short words still match.
+-- GET /rest/v1/rpc/search_listings_fuzzy?p_query=...&status=eq.active&limit=10
+CREATE OR REPLACE FUNCTION search_listings_fuzzy(p_query TEXT)
+RETURNS SETOF listings AS $$
+    SELECT l.*
+    FROM listings l
+    WHERE p_query <% l.title
+       OR p_query <% l.category
+       OR p_query <% l.location
+    ORDER BY greatest(
+                 word_similarity(p_query, l.title),
+                 word_similarity(p_query, coalesce(l.category, '')),
+                 word_similarity(p_query, coalesce(l.location, ''))
+             ) DESC,
+             l.created_at DESC,
+             l.id DESC;
+$$ LANGUAGE sql STABLE
+SET pg_trgm.word_similarity_threshold = 0.4;
+
+
+-- ============================================================
+-- SEMANTIC (VECTOR) SEARCH
+-- semantic_search_listings_tool embeds the query (tools/embeddings.py)
+-- and calls match_listings() for nearest neighbours.
+-- ============================================================
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- HNSW: no training step, good recall while the table is still growing
+-- (replaces the commented-out ivfflat index in complete_schema.sql)
+CREATE INDEX IF NOT EXISTS idx_product_embeddings_embedding_hnsw
+    ON product_embeddings USING hnsw (embedding vector_cosine_ops);
+
+-- Function: Nearest active listings to a query embedding (cosine distance)
+-- An HNSW scan returns at most hnsw.ef_search candidates (pgvector default 40),
+-- so the function raises it to the tool's SEMANTIC_MAX_CANDIDATES (200);
+-- p_match_count above that still yields at most 200 rows
+-- PostgREST applies the remaining filters (category, price, select, limit) on top:
+-- POST /rest/v1/rpc/match_listings?category=ilike.*emlak*&limit=10
+--   {"p_query_embedding": "[...]", "p_match_count": 50}
+CREATE OR REPLACE FUNCTION match_listings(
+    p_query_embedding vector(1536),
+    p_match_count INTEGER DEFAULT 50
+) RETURNS SETOF listings AS $$
+    SELECT l.*
+    FROM (
+        SELECT pe.listing_id, pe.embedding <=> p_query_embedding AS distance
+        FROM product_embeddings pe
+        ORDER BY pe.embedding <=> p_query_embedding
+        LIMIT p_match_count
+    ) nearest
+    JOIN listings l ON l.id = nearest.listing_id
+    WHERE l.status = 'active'
+    ORDER BY nearest.distance;
+$$ LANGUAGE sql STABLE
+SET hnsw.ef_search = 200;
@@ -286,6 +286,30 @@ END;
 $$ LANGUAGE plpgsql;
 
 
+-- Function: Apply batched rate limit increments
+-- MCP server limitleri local olarak uygular (tools/rate_limiter.py) ve kabul
+-- edilen işlemleri tek çağrıda toplu yazar. Güncel sayaçları döndürür
+-- (diğer worker'ların artışları dahil).
+CREATE OR REPLACE FUNCTION apply_rate_limit_increments(
+    p_increments JSONB  -- [{"user_id": "...", "action": "...", "window_end": "...", "delta": 3}, ...]
+) RETURNS TABLE(
+    user_id UUID,
+    action TEXT,
+    window_end TIMESTAMPTZ,
+    current_count INTEGER
+) AS $$
+    UPDATE rate_limits AS r
+    SET count = r.count + i.delta,
+        updated_at = NOW()
+    FROM jsonb_to_recordset(p_increments)
+        AS i(user_id UUID, action TEXT, window_end TIMESTAMPTZ, delta INTEGER)
+    WHERE r.user_id = i.user_id
+      AND r.action = i.action
+      AND r.window_end = i.window_end
+    RETURNING r.user_id, r.action, r.window_end, r.count;
+$$ LANGUAGE sql;
+
+
 -- Function: Log audit event
 CREATE OR REPLACE FUNCTION log_audit(
     p_user_id UUID,
@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+# ============================================================
+# Local PostgREST stub: streamed tools/call için sahte /rest/v1/listings
+# ============================================================
+STUB_ROWS = json.dumps([
+    {"id": f"00000000-0000-0000-0000-{i:012d}", "title": f"iPhone {i}",
+     "created_at": f"2025-01-01T00:00:{i:02d}+00:00"}
+    for i in range(10)
+]).encode()
+
+
+async def handle_stub(reader, writer):
+    try:
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: " + str(len(STUB_ROWS)).encode() + b"\r\nConnection: close\r\n\r\n" + STUB_ROWS)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+def proc_stats(pid):
+    """(RSS MB, CPU saniye) - /proc üzerinden (Linux)"""
+
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    return rss_kb / 1024, (int(fields[11]) + int(fields[12])) / ticks
+
+
+# ============================================================
+# SSE client
+# ============================================================
+class Connection:
+    def __init__(self):
+        self.session_id = None
+        self.keepalives = 0
+        self.messages = []
+        self.reader = None
+        self.writer = None
+
+    async def open(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(f"GET /sse HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await self.writer.drain()
+        while self.session_id is None:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("closed before endpoint event")
+            if line.startswith(b"data: "):
+                endpoint = json.loads(line[6:])["params"]["endpoint"]
+                self.session_id = endpoint.split("session_id=", 1)[1]
+
+    async def listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            if line.startswith(b": keepalive"):
+                self.keepalives += 1
+            elif line.startswith(b"data: "):
+                self.messages.append(json.loads(line[6:]))
+
+
+def post(base_url, path, payload):
+    request = urllib.request.Request(base_url + path, data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Hold N concurrent SSE connections against a local server")
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--hold", type=float, default=30.0, help="Bağlantıları açık tutma süresi (saniye)")
+    parser.add_argument("--keepalive", type=float, default=10.0, help="Sunucunun MCP_SSE_KEEPALIVE_SECONDS değeri")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ramp", type=int, default=500, help="Aynı anda açılan bağlantı sayısı")
+    args = parser.parse_args()
+
+    # Her bağlantı client + server tarafında birer fd
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < args.connections + 100:
+        print(f"⚠️ RLIMIT_NOFILE={hard}: {args.connections} bağlantı için yetersiz olabilir")
+
+    stub = await asyncio.start_server(handle_stub, "127.0.0.1", 0)
+    stub_port = stub.sockets[0].getsockname()[1]
+
+    env = dict(os.environ,
+               SUPABASE_URL=f"http://127.0.0.1:{stub_port}",
+               SUPABASE_SERVICE_KEY="stub",
+               SEARCH_CACHE_BACKEND="off",
+               EMBEDDING_WORKER="0",
+               MCP_SSE_KEEPALIVE_SECONDS=str(args.keepalive))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.port),
+         "--log-level", "warning", "--backlog", "4096", "--timeout-graceful-shutdown", "5"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(base_url + "/", timeout=1)
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+
+        rss_before, _ = proc_stats(server.pid)
+        print(f"📊 {args.connections} SSE connections, hold {args.hold:.0f}s, keepalive {args.keepalive:.0f}s")
+        print("=" * 60)
+
+        connections = [Connection() for _ in range(args.connections)]
+        semaphore = asyncio.Semaphore(args.ramp)
+
+        async def open_one(connection):
+            async with semaphore:
+                await connection.open("127.0.0.1", args.port)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(open_one(c) for c in connections), return_exceptions=True)
+        failed = sum(1 for r in results if isinstance(r, Exception))
+        connections = [c for c, r in zip(connections, results) if not isinstance(r, Exception)]
+        print(f"connected: {len(connections)} ({failed} failed) in {time.perf_counter() - start:.1f}s")
+
+        listeners = [asyncio.create_task(c.listen()) for c in connections]
+        rss_open, cpu_open = proc_stats(server.pid)
+
+        # Routing: streamed tools/call sadece kendi session'ına gitmeli
+        sample = connections[::max(1, len(connections) // 5)][:5]
+        loop = asyncio.get_running_loop()
+        for index, connection in enumerate(sample):
+            await loop.run_in_executor(None, post, base_url, f"/messages?session_id={connection.session_id}", {
+                "jsonrpc": "2.0", "id": 1000 + index, "method": "tools/call",
+                "params": {"name": "search_listings_tool", "arguments": {"query": "iphone"}, "_meta": {"stream": True}},
+            })
+
+        await asyncio.sleep(args.hold)
+        rss_hold, cpu_hold = proc_stats(server.pid)
+
+        routed = sum(
+            1 for index, c in enumerate(sample)
+            if any(m.get("id") == 1000 + index for m in c.messages)
+        )
+        misrouted = sum(1 for c in connections if c not in sample and c.messages)
+        keepalives = sum(c.keepalives for c in connections)
+        expected = len(connections) * args.hold / args.keepalive
+
+        print(f"server RSS: {rss_before:.0f} MB idle → {rss_open:.0f} MB connected "
+              f"({(rss_open - rss_before) * 1024 / max(1, len(connections)):.1f} KB/connection)")
+        print(f"server CPU while holding: {cpu_hold - cpu_open:.2f}s over {args.hold:.0f}s")
+        print(f"keepalives received: {keepalives} (~{expected:.0f} expected)")
+        print(f"streamed calls routed: {routed}/{len(sample)}, misrouted: {misrouted}")
+        print(f"RSS after hold: {rss_hold:.0f} MB")
+
+        for task in listeners:
+            task.cancel()
+        for connection in connections:
+            connection.writer.close()
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        stub.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,143 +5,185 @@
 import os
 import json
 import asyncio
+import hashlib
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse, JSONResponse
-
-from tools.clean_price import clean_price as clean_price_core
-from tools.insert_listing import insert_listing as insert_listing_core
-from tools.search_listings import search_listings as search_listings_core
-from tools.update_listing import update_listing as update_listing_core
-from tools.delete_listing import delete_listing as delete_listing_core
-from tools.list_user_listings import list_user_listings as list_user_listings_core
-
-app = FastAPI(title="Pazarglobal MCP Server")
-
-# Tool definitions for MCP protocol
-TOOLS = [
-    {
-        "name": "clean_price_tool",
-        "description": "Fiyat metnini temizler ve sayısal değeri döndürür",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "price_text": {"type": "string", "description": "Temizlenecek fiyat metni"}
-            }
-        }
-    },
-    {
-        "name": "search_listings_tool",
-        "description": "Supabase'den ilan arar",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string"},
-                "category": {"type": "string"},
-                "condition": {"type": "string"},
-                "location": {"type": "string"},
-                "min_price": {"type": "integer"},
-                "max_price": {"type": "integer"},
-                "limit": {"type": "integer", "default": 10},
-                "metadata_type": {"type": "string"}
-            }
-        }
-    },
-    {
-        "name": "insert_listing_tool",
-        "description": "Yeni ilan ekler",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "title": {"type": "string"},
-                "user_id": {"type": "string"},
-                "price": {"type": "integer"},
-                "condition": {"type": "string"},
-                "category": {"type": "string"},
-                "description": {"type": "string"},
-                "location": {"type": "string"},
-                "stock": {"type": "integer"},
-                "metadata": {"type": "object"}
-            },
-            "required": ["title"]
-        }
-    },
-    {
-        "name": "update_listing_tool",
-        "description": "Mevcut ilanı günceller",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "listing_id": {"type": "string"},
-                "title": {"type": "string"},
-                "price": {"type": "integer"},
-                "condition": {"type": "string"},
-                "category": {"type": "string"},
-                "description": {"type": "string"},
-                "location": {"type": "string"},
-                "stock": {"type": "integer"},
-                "metadata": {"type": "object"}
-            },
-            "required": ["listing_id"]
-        }
-    },
-    {
-        "name": "delete_listing_tool",
-        "description": "İlanı siler",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "listing_id": {"type": "string"}
-            },
-            "required": ["listing_id"]
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # orjson yoksa stdlib json
+    orjson = None
+
+# Tool modülleri import edilince @tool ile tool_registry'ye kaydolur
+import tools.clean_price  # noqa: F401
+import tools.insert_listing  # noqa: F401
+import tools.update_listing  # noqa: F401
+import tools.delete_listing  # noqa: F401
+import tools.list_user_listings  # noqa: F401
+import tools.bulk_insert_listings  # noqa: F401
+import tools.semantic_search_listings  # noqa: F401
+from tools.search_listings import search_listings_stream as search_listings_stream_core
+from tools.search_listings import CASE_INSENSITIVE_ARGS as SEARCH_CASE_INSENSITIVE_ARGS
+from tools.registry import Tool, ToolArgumentError, tool_registry
+from tools.supabase_client import start_client, close_client
+from tools.embeddings import close_embedder
+from tools.search_cache import make_key, search_cache
+from tools.single_flight import single_flight
+from tools.embedding_worker import embedding_worker
+from tools.security_tools import rate_limiter
+from tools.audit_sink import audit_sink
+from tools.sse_registry import SSESession, sse_sessions
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson if installed)"""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS: int vb. key'ler stdlib json gibi string'e çevrilir
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (default response class)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class JSONRPCResponse(Response):
+    """Body zaten serialize edilmiş JSON-RPC cevabı (bytes); tekrar encode edilmez"""
+
+    media_type = "application/json"
+
+
+def error_envelope(request_id: Any, code: int, message: str) -> bytes:
+    return dumps({
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {
+            "code": code,
+            "message": message
         }
-    },
-    {
-        "name": "list_user_listings_tool",
-        "description": "Kullanıcının tüm ilanlarını listeler",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "user_id": {"type": "string"},
-                "limit": {"type": "integer", "default": 20}
-            },
-            "required": ["user_id"]
+    })
+
+
+def tool_call_envelope(request_id: Any, result: Any) -> bytes:
+    """
+    tools/call cevabı tek geçişte: result bir kez serialize edilir, MCP text
+    content'i olarak string'e gömülür ve envelope byte olarak birleştirilir
+    (dict envelope + FastAPI'nin ikinci encode'u yok).
+    """
+    text = dumps(result).decode()
+    return (
+        b'{"jsonrpc":"2.0","id":' + dumps(request_id)
+        + b',"result":{"content":[{"type":"text","text":' + dumps(text) + b'}]}}'
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown: shared Supabase HTTP client pool, embedding worker, rate limit sync, audit sink, SSE keepalive"""
+    await start_client()
+    await embedding_worker.start()
+    await audit_sink.start()
+    try:
+        yield
+    finally:
+        await embedding_worker.stop()
+        await rate_limiter.close()
+        await audit_sink.stop()
+        await sse_sessions.stop()
+        await close_embedder()
+        await close_client()
+
+
+app = FastAPI(title="Pazarglobal MCP Server", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Max concurrent tool calls per JSON-RPC batch
+BATCH_CONCURRENCY = int(os.getenv("MCP_BATCH_CONCURRENCY", "8"))
+
+PROTOCOL_VERSION = "2024-11-05"
+SERVER_INFO = {
+    "name": "pazarglobal-mcp-python",
+    "version": "1.0.0"
+}
+
+
+class StaticResult:
+    """
+    Pre-serialized JSON-RPC result (initialize, tools/list): her istekte
+    sadece id değişir, result byte'ları bir kez üretilir.
+    """
+
+    def __init__(self, result: Dict[str, Any]):
+        self.result = result
+        self.body = dumps(result)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+
+    def envelope(self, request_id: Any) -> bytes:
+        return b'{"jsonrpc":"2.0","id":' + dumps(request_id) + b',"result":' + self.body + b'}'
+
+
+STATIC_RESULTS: Dict[str, StaticResult] = {}
+
+
+def refresh_static_results() -> None:
+    """
+    initialize / tools/list cevaplarını yeniden üretir.
+    tool_registry değiştiğinde otomatik çağrılır.
+    """
+    STATIC_RESULTS["initialize"] = StaticResult({
+        "protocolVersion": PROTOCOL_VERSION,
+        "serverInfo": SERVER_INFO,
+        "capabilities": {
+            "tools": {}
         }
-    }
-]
+    })
+    STATIC_RESULTS["tools/list"] = StaticResult({"tools": tool_registry.schemas()})
+
+
+refresh_static_results()
+tool_registry.subscribe(refresh_static_results)
+
+
+# Okuma tool'ları: eşzamanlı aynı çağrılar tek Supabase isteğinde birleşir
+# (değer: key'de lowercase yapılacak argümanlar - sadece ilike/FTS alanları, eq.* filtreleri hayır)
+COALESCED_TOOLS = {
+    "search_listings_tool": SEARCH_CASE_INSENSITIVE_ARGS,
+    "list_user_listings_tool": frozenset(),
+}
+
 
 async def execute_tool(tool_name: str, arguments: dict) -> dict:
     """Execute a tool and return result"""
     print(f"🔧 Executing tool: {tool_name} with args: {arguments}")
-    
+
+    tool = tool_registry.get(tool_name)
+    if tool is None:
+        return {"success": False, "error": f"Unknown tool: {tool_name}"}
     try:
-        if tool_name == "clean_price_tool":
-            result = clean_price_core(arguments.get("price_text"))
-            return {"success": True, "result": result}
-            
-        elif tool_name == "search_listings_tool":
-            result = await search_listings_core(**arguments)
-            return {"success": True, "result": result}
-            
-        elif tool_name == "insert_listing_tool":
-            result = await insert_listing_core(**arguments)
-            return {"success": True, "result": result}
-            
-        elif tool_name == "update_listing_tool":
-            result = await update_listing_core(**arguments)
-            return {"success": True, "result": result}
-            
-        elif tool_name == "delete_listing_tool":
-            result = await delete_listing_core(**arguments)
-            return {"success": True, "result": result}
-            
-        elif tool_name == "list_user_listings_tool":
-            result = await list_user_listings_core(**arguments)
-            return {"success": True, "result": result}
-            
-        else:
-            return {"success": False, "error": f"Unknown tool: {tool_name}"}
-            
+        arguments = tool.validate(arguments)
+    except ToolArgumentError as e:
+        return {"success": False, "error": str(e)}
+
+    if tool_name in COALESCED_TOOLS:
+        key = (tool_name, make_key(arguments, fold=COALESCED_TOOLS[tool_name]))
+        return await single_flight.do(key, lambda: _execute_tool(tool, arguments))
+    return await _execute_tool(tool, arguments)
+
+
+async def _execute_tool(tool: Tool, arguments: dict) -> dict:
+    try:
+        result = await tool.call(arguments)
+        return {"success": True, "result": result}
     except Exception as e:
         print(f"❌ Tool execution error: {str(e)}")
         return {"success": False, "error": str(e)}
@@ -150,7 +192,74 @@ async def execute_tool(tool_name: str, arguments: dict) -> dict:
 @app.get("/")
 async def root():
     """Health check endpoint"""
-    return {"status": "ok", "server": "Pazarglobal MCP Server (Custom)", "tools": len(TOOLS)}
+    return {"status": "ok", "server": "Pazarglobal MCP Server (Custom)", "tools": len(tool_registry)}
+
+
+@app.get("/tools")
+async def tools_endpoint(request: Request):
+    """
+    tools/list sonucu (JSON-RPC envelope'suz) - ETag ile revalidate edilebilir,
+    değişmediyse 304. Tool listesini cache'leyen client'lar için.
+    """
+    static = STATIC_RESULTS["tools/list"]
+    if request.headers.get("if-none-match") == static.etag:
+        return Response(status_code=304, headers={"ETag": static.etag})
+    return JSONRPCResponse(static.body, headers={"ETag": static.etag})
+
+
+@app.get("/stats")
+async def stats():
+    """Cache counters (hit/miss/eviction) for sizing"""
+    return {
+        "search_cache": search_cache.stats() if search_cache else None,
+        "embedding_worker": embedding_worker.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "audit_sink": audit_sink.stats(),
+        "sse": sse_sessions.stats(),
+        "single_flight": single_flight.stats(),
+    }
+
+
+# tools/call params._meta.stream=true → sonuç SSE üzerinden parça parça gönderilir
+STREAMING_TOOLS = {
+    "search_listings_tool": search_listings_stream_core,
+}
+
+
+def wants_stream(body: Dict[str, Any]) -> bool:
+    params = body.get("params")
+    if body.get("method") != "tools/call" or "id" not in body or not isinstance(params, dict):
+        return False
+    meta = params.get("_meta")
+    return isinstance(meta, dict) and bool(meta.get("stream")) and params.get("name") in STREAMING_TOOLS
+
+
+async def stream_tool_call(session: SSESession, request_id: Any, tool_name: str, arguments: dict) -> None:
+    """
+    Satırlar geldikçe notifications/tools/partial_result olarak (requestId ile)
+    gönderilir; son olarak aynı id ile normal tools/call cevabı (satırsız özet) gelir.
+    """
+    print(f"🔧 Streaming tool: {tool_name} with args: {arguments}")
+    seq = 0
+    try:
+        arguments = tool_registry.get(tool_name).validate(arguments)
+        async for kind, payload in STREAMING_TOOLS[tool_name](**arguments):
+            if kind == "rows":
+                await session.send(dumps({
+                    "jsonrpc": "2.0",
+                    "method": "notifications/tools/partial_result",
+                    "params": {
+                        "requestId": request_id,
+                        "seq": seq,
+                        "rows": payload
+                    }
+                }))
+                seq += 1
+            else:
+                await session.send(tool_call_envelope(request_id, {"success": True, "result": payload}))
+    except Exception as e:
+        print(f"❌ Tool streaming error: {str(e)}")
+        await session.send(tool_call_envelope(request_id, {"success": False, "error": str(e)}))
 
 
 @app.get("/sse")
@@ -161,6 +270,8 @@ async def sse_endpoint(request: Request):
     """
     print(f"📡 SSE connection from: {request.client.host}")
     
+    session = sse_sessions.open()
+    
     async def event_generator():
         # Send initial endpoint event (MCP protocol handshake)
         # Event type MUST be "message" for MCP SDK
@@ -168,25 +279,23 @@ async def sse_endpoint(request: Request):
             "jsonrpc": "2.0",
             "method": "endpoint",
             "params": {
-                "endpoint": "/messages"
+                "endpoint": f"/messages?session_id={session.id}"
             }
         })
         
-        # MCP SDK expects 'message' event type, not 'endpoint'
-        yield f"event: message\ndata: {endpoint_message}\n\n"
-        
-        print(f"✅ Sent endpoint message to client")
-        
-        # Keep connection alive with periodic pings
-        while True:
-            # Check if client disconnected
-            if await request.is_disconnected():
-                print("📡 Client disconnected from SSE")
-                break
-                
-            # Send keepalive ping every 30 seconds
-            yield f": keepalive\n\n"
-            await asyncio.sleep(30)
+        try:
+            # MCP SDK expects 'message' event type, not 'endpoint'
+            yield f"event: message\ndata: {endpoint_message}\n\n"
+            
+            print(f"✅ Sent endpoint message to client (session {session.id})")
+            
+            # Bağlantı başına timer / disconnect polling yok: keepalive'lar registry'nin
+            # ortak ticker'ından kuyruğa düşer; kopan bağlantı bir sonraki yazmada düşer
+            while True:
+                yield await session.queue.get()
+        finally:
+            sse_sessions.close(session)
+            print(f"📡 Client disconnected from SSE (session {session.id})")
     
     return StreamingResponse(
         event_generator(),
@@ -199,41 +308,17 @@ async def sse_endpoint(request: Request):
     )
 
 
-@app.post("/messages")
-async def messages_endpoint(request: Request):
-    """Handle MCP protocol messages"""
+async def handle_message(body: Any) -> bytes:
+    """Handle a single JSON-RPC message and return its serialized response"""
+    if not isinstance(body, dict):
+        return error_envelope(None, -32600, "Invalid Request")
+
     try:
-        body = await request.json()
-        print(f"📨 Received message: {body}")
-        
         method = body.get("method")
         
-        # Handle initialize
-        if method == "initialize":
-            return {
-                "jsonrpc": "2.0",
-                "id": body.get("id"),
-                "result": {
-                    "protocolVersion": "2024-11-05",
-                    "serverInfo": {
-                        "name": "pazarglobal-mcp-python",
-                        "version": "1.0.0"
-                    },
-                    "capabilities": {
-                        "tools": {}
-                    }
-                }
-            }
-        
-        # Handle tools/list
-        elif method == "tools/list":
-            return {
-                "jsonrpc": "2.0",
-                "id": body.get("id"),
-                "result": {
-                    "tools": TOOLS
-                }
-            }
+        # Handle initialize / tools/list (precomputed)
+        if method in STATIC_RESULTS:
+            return STATIC_RESULTS[method].envelope(body.get("id"))
         
         # Handle tools/call
         elif method == "tools/call":
@@ -243,39 +328,65 @@ async def messages_endpoint(request: Request):
             
             result = await execute_tool(tool_name, arguments)
             
-            return {
-                "jsonrpc": "2.0",
-                "id": body.get("id"),
-                "result": {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": json.dumps(result, ensure_ascii=False)
-                        }
-                    ]
-                }
-            }
+            return tool_call_envelope(body.get("id"), result)
         
         else:
-            return {
-                "jsonrpc": "2.0",
-                "id": body.get("id"),
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {method}"
-                }
-            }
+            return error_envelope(body.get("id"), -32601, f"Method not found: {method}")
             
     except Exception as e:
         print(f"❌ Error handling message: {str(e)}")
-        return {
-            "jsonrpc": "2.0",
-            "id": body.get("id", None),
-            "error": {
-                "code": -32603,
-                "message": f"Internal error: {str(e)}"
-            }
-        }
+        return error_envelope(body.get("id", None), -32603, f"Internal error: {str(e)}")
+
+
+async def handle_batch(batch: list) -> Response:
+    """
+    JSON-RPC 2.0 batch: istekler BATCH_CONCURRENCY limitiyle paralel çalışır,
+    cevaplar istek sırasıyla döner. Notification'lar (id yok) cevapsızdır.
+    """
+    if not batch:
+        return JSONRPCResponse(error_envelope(None, -32600, "Invalid Request: empty batch"))
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(item: Any) -> bytes:
+        async with semaphore:
+            return await handle_message(item)
+
+    responses = await asyncio.gather(*(run(item) for item in batch))
+    replies = [
+        response for item, response in zip(batch, responses)
+        if not (isinstance(item, dict) and "method" in item and "id" not in item)
+    ]
+    if not replies:
+        return Response(status_code=202)
+    return JSONRPCResponse(b"[" + b",".join(replies) + b"]")
+
+
+@app.post("/messages")
+async def messages_endpoint(request: Request):
+    """Handle MCP protocol messages (single object or JSON-RPC batch)"""
+    try:
+        body = loads(await request.body())
+    except Exception as e:
+        print(f"❌ Parse error: {str(e)}")
+        return JSONRPCResponse(error_envelope(None, -32700, f"Parse error: {str(e)}"))
+
+    print(f"📨 Received message: {body}")
+
+    # Fast path: initialize / tools/list → hazır byte'lar (her POST id'li cevap alır)
+    if isinstance(body, dict) and "id" in body and body.get("method") in STATIC_RESULTS:
+        return JSONRPCResponse(STATIC_RESULTS[body["method"]].envelope(body["id"]))
+
+    # Streaming: tools/call + _meta.stream → 202, sonuç bu session'ın SSE akışından gelir
+    session = sse_sessions.get(request.query_params.get("session_id"))
+    if session is not None and isinstance(body, dict) and wants_stream(body):
+        params = body["params"]
+        session.spawn(stream_tool_call(session, body["id"], params["name"], params.get("arguments", {})))
+        return Response(status_code=202)
+
+    if isinstance(body, list):
+        return await handle_batch(body)
+    return JSONRPCResponse(await handle_message(body))
 
 
 if __name__ == "__main__":
@@ -288,7 +399,7 @@ if __name__ == "__main__":
     print("🚀 Pazarglobal MCP Server (Custom Implementation)")
     print("⚠️  FastMCP bypass edildi - Railway proxy uyumlu")
     print(f"📡 Host: {host}:{port}")
-    print(f"🔧 Tools: {len(TOOLS)} available")
+    print(f"🔧 Tools: {len(tool_registry)} available")
     print(f"🌐 SSE Endpoint: http://{host}:{port}/sse")
     print(f"📨 Messages Endpoint: http://{host}:{port}/messages")
     print("="*60 + "\n")
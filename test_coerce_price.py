@@ -0,0 +1,55 @@
+from tools.clean_price import coerce_price
+
+
+# (girdi, beklenen int) - write path'te sessizce bozulmaması gereken formatlar
+VALID = [
+    ("45.000", 45000),
+    ("54,999 TL", 54999),
+    ("1.250.000 TL", 1250000),
+    ("₺2.500", 2500),
+    ("45000", 45000),
+    ("45000.00", 45000),
+    ("1.250,00", 1250),
+    ("1,250.00", 1250),
+    ("22 bin", 22000),
+    ("2.5 bin", 2500),
+    ("1,5 milyon", 1500000),
+    ("22bin", 22000),
+    ("1,5milyon", 1500000),
+    ("2.5bin", 2500),
+    ("yaklaşık 45.000 TL", 45000),
+    ("", None),
+    (45000, 45000),
+    (45000.0, 45000),
+    (None, None),
+]
+
+# Belirsiz veya tam sayı olmayan fiyatlar: tahmin yerine ValueError
+INVALID = [
+    "45000.50",   # kuruşlu fiyat: int kolona yuvarlanmaz
+    "1,5",        # çarpansız 1.5 TL
+    "1.2345",     # ne binlik grup ne 1-2 haneli ondalık
+    "1.250 bin",  # 1.250.000 mü 1.250 mi?
+    "1.250,000",
+    "45 - 50 bin",
+    "ucuz",
+]
+
+
+def test_coerce_price():
+    for text, expected in VALID:
+        result = coerce_price(text)
+        assert result == expected, f"{text!r} → {result!r} (expected {expected!r})"
+        print(f"✅ {text!r} → {result!r}")
+
+    for text in INVALID:
+        try:
+            result = coerce_price(text)
+        except ValueError as e:
+            print(f"✅ {text!r} → ValueError: {e}")
+        else:
+            raise AssertionError(f"{text!r} → {result!r} (expected ValueError)")
+
+
+if __name__ == "__main__":
+    test_coerce_price()
@@ -0,0 +1,264 @@
+"""
+Buffered audit log writer: log_audit_tool istek yolunda I/O yapmaz
+
+Olaylar bounded bir kuyruğa bırakılır (put_nowait); arka plan task'ı
+AUDIT_BATCH_SIZE olay veya AUDIT_FLUSH_MS dolunca audit_logs'a tek bulk
+insert yapar. id ve created_at client tarafında üretilir, yani log_id
+hemen döner ve gecikmeli yazım olay zamanını değiştirmez.
+
+- Supabase erişilemezse (network / 5xx) batch AUDIT_SPILL_PATH'e
+  append-only JSONL olarak yazılır; sonraki başarılı flush'ta geri yüklenir
+- Kuyruk doluysa olay düşürülmez, doğrudan diske yazılır
+- 4xx (ör. FK ihlali) kalıcı hatadır: batch satır satır denenir, bozuk satır atlanır
+- Shutdown'da kuyruk boşaltılır (server.py lifespan), kalanlar diske yazılır
+
+Env:
+    AUDIT_BUFFERED: "1" (default) veya "0" (her olayda log_audit RPC)
+    AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_MS
+    AUDIT_SPILL_PATH: spill dosyası (default: logs/audit_spill.jsonl)
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from .supabase_client import WRITE_TIMEOUT, get_client
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+
+AUDIT_BUFFERED = os.getenv("AUDIT_BUFFERED", "1") not in ("0", "false", "False")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_MS = int(os.getenv("AUDIT_FLUSH_MS", "500"))
+AUDIT_SPILL_PATH = os.getenv(
+    "AUDIT_SPILL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "audit_spill.jsonl"),
+)
+
+
+def _append_lines(path: str, rows: List[Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+
+def _read_lines(path: str) -> List[Dict[str, Any]]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                print(f"⚠️ Skipping corrupt audit spill line: {line[:80]}")
+    return rows
+
+
+class AuditSink:
+    """Batching writer for audit_logs rows with disk spill"""
+
+    def __init__(self, queue_size: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_ms: int = AUDIT_FLUSH_MS, spill_path: str = AUDIT_SPILL_PATH):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self.spill_path = spill_path
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.batches = 0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------------------------------------------------------------- producer
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        """
+        İstek yolundan çağrılır: asla beklemez. Worker henüz başlamadıysa
+        (ör. script'ten kullanım) ilk olayda başlatılır.
+        """
+        if not self.running:
+            if self._stopping:
+                # Shutdown sonrası gelen olay: doğrudan diske
+                asyncio.create_task(self._spill([row]))
+                return
+            self._task = asyncio.create_task(self._run(), name="audit-sink")
+        try:
+            self.queue.put_nowait(row)
+            self.enqueued += 1
+        except asyncio.QueueFull:
+            # Audit kaydı kaybedilmez: kuyruk doluysa diske
+            asyncio.create_task(self._spill([row]))
+
+    # ---------------------------------------------------------------- consumer
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="audit-sink")
+        print(f"📝 Audit sink started (batch={self.batch_size}, flush={self.flush_ms}ms)")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Kuyruğu timeout süresince Supabase'e boşaltır; kalanları diske yazar.
+        """
+        self._stopping = True
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Audit sink stopping with {self.queue.qsize()} pending events, spilling to disk")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        leftover = []
+        while not self.queue.empty():
+            leftover.append(self.queue.get_nowait())
+            self.queue.task_done()
+        if leftover:
+            await self._spill(leftover)
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.flush_ms / 1000
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        if os.path.exists(self.spill_path):
+            await self._replay()
+        while True:
+            batch = await self._collect()
+            try:
+                if await self._write(batch) and os.path.exists(self.spill_path):
+                    # Supabase tekrar erişilebilir: önceki kesintinin kayıtlarını yükle
+                    await self._replay()
+            except asyncio.CancelledError:
+                # stop() timeout: yazılamayan batch kaybolmasın
+                await self._spill(batch)
+                raise
+            except Exception as e:
+                print(f"❌ Audit batch failed: {type(e).__name__}: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Batch'i yazar. False → Supabase erişilemedi, batch diske yazıldı.
+        """
+        try:
+            await self._post(rows)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                await self._spill(rows)
+                return False
+            if len(rows) > 1:
+                return await self._write_individually(rows)
+            self.rejected += 1
+            print(f"⚠️ Audit row rejected ({e.response.status_code}): {e.response.text[:200]}")
+            return True
+        except httpx.HTTPError as e:
+            print(f"⚠️ Audit batch spilled to disk: {type(e).__name__}: {str(e)}")
+            await self._spill(rows)
+            return False
+        self.written += len(rows)
+        self.batches += 1
+        return True
+
+    async def _write_individually(self, rows: List[Dict[str, Any]]) -> bool:
+        for index, row in enumerate(rows):
+            if not await self._write([row]):
+                await self._spill(rows[index + 1:])
+                return False
+        return True
+
+    async def _post(self, rows: List[Dict[str, Any]]) -> None:
+        client = get_client()
+        response = await client.post(
+            f"{SUPABASE_URL}/rest/v1/audit_logs",
+            json=rows,
+            headers={
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+                "Content-Type": "application/json",
+                "Prefer": "return=minimal",
+            },
+            timeout=WRITE_TIMEOUT,
+        )
+        response.raise_for_status()
+
+    # ---------------------------------------------------------------- spill
+
+    async def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        await asyncio.to_thread(_append_lines, self.spill_path, rows)
+        self.spilled += len(rows)
+
+    async def _replay(self) -> None:
+        """
+        Spill dosyasını batch'ler halinde audit_logs'a yükler. Dosya önce
+        yeniden adlandırılır; yükleme sırasındaki yeni spill'ler ayrı dosyaya gider.
+        """
+        replay_path = self.spill_path + ".replay"
+        if not os.path.exists(replay_path):
+            os.replace(self.spill_path, replay_path)
+        rows = await asyncio.to_thread(_read_lines, replay_path)
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            if not await self._write(chunk):
+                # Hâlâ erişilemiyor: chunk spill edildi, kalanları da geri yaz
+                await self._spill(rows[start + self.batch_size:])
+                break
+            self.replayed += len(chunk)
+        os.remove(replay_path)
+        if self.replayed:
+            print(f"📝 Audit spill replayed ({self.replayed} rows total)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "spill_file": os.path.exists(self.spill_path),
+        }
+
+
+audit_sink = AuditSink()
@@ -0,0 +1,220 @@
+"""
+Bulk insert listings into Supabase (multi-item listings, shop imports)
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+import httpx
+from .clean_price import coerce_price
+from .embedding_worker import notify_listing_upsert
+from .insert_listing import insert_listing
+from .registry import parameters_schema, tool
+from .search_cache import invalidate_for_listing
+from .suggest_category import suggest_categories
+from .supabase_client import WRITE_TIMEOUT, get_client
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+
+# Tek çağrıda kabul edilen maksimum ilan sayısı ve PostgREST chunk boyutu
+BULK_INSERT_MAX_ITEMS = int(os.getenv("BULK_INSERT_MAX_ITEMS", "500"))
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "100"))
+
+DEFAULT_USER_ID = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"
+
+LISTING_FIELDS = ("title", "price", "condition", "category", "description", "location", "stock", "metadata")
+
+
+def _prepare_row(item: Dict[str, Any], suggestion: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    insert_listing ile aynı kategori doğrulama kuralları (print'siz, sync).
+    """
+    category = item.get("category")
+    metadata = item.get("metadata")
+
+    if not category or str(category).strip() == "":
+        category = suggestion["suggested_category"] or "Genel"
+    else:
+        if not suggestion.get("is_correct", True):
+            metadata = dict(metadata or {})
+            metadata["original_category"] = category
+            metadata["category_corrected"] = True
+            category = suggestion["suggested_category"]
+
+    row: Dict[str, Any] = {field: item.get(field) for field in LISTING_FIELDS}
+    row["category"] = category
+    row["metadata"] = metadata
+    # TEMPORARY FIX: same as insert_listing - always use default UUID until auth is implemented
+    row["user_id"] = DEFAULT_USER_ID
+    row["status"] = "active"
+    return row
+
+
+def _coerce_listing_prices(listings: Any) -> Any:
+    """tools/call coercer: elemanlardaki "45.000" gibi fiyat metinlerini int'e çevirir"""
+    if not isinstance(listings, list):
+        return listings
+    coerced = []
+    for index, item in enumerate(listings):
+        if isinstance(item, dict) and not isinstance(item.get("price"), (int, type(None))):
+            try:
+                item = {**item, "price": coerce_price(item["price"])}
+            except ValueError as e:
+                raise ValueError(f"[{index}].price {e}")
+        coerced.append(item)
+    return coerced
+
+
+async def _post(client: httpx.AsyncClient, url: str, headers: dict, rows: List[Dict[str, Any]]) -> httpx.Response:
+    return await client.post(url, json=rows, headers=headers, timeout=WRITE_TIMEOUT)
+
+
+@tool("bulk_insert_listings_tool", "Birden fazla ilanı tek seferde ekler (toplu ürün yükleme)", schema={
+    # Eleman şeması insert_listing'in signature'ından (user_id hariç)
+    "listings": {"items": parameters_schema(insert_listing, include=LISTING_FIELDS)},
+}, coerce={"listings": _coerce_listing_prices})
+async def bulk_insert_listings(listings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Birden fazla ilanı tek seferde ekler.
+    Kategoriler tek geçişte belirlenir, satırlar PostgREST array POST ile
+    BULK_INSERT_CHUNK_SIZE'lık parçalar halinde gönderilir. Bir chunk
+    reddedilirse hatalı satırları bulmak için o chunk satır satır denenir.
+
+    Args:
+        listings: İlan listesi; her eleman insert_listing argümanlarını içerir
+            (title zorunlu; price, condition, category, description, location, stock, metadata)
+
+    Returns:
+        dict with:
+            - success: bool (tüm satırlar eklendiyse True)
+            - status_code: int (201 hepsi, 207 kısmi, 400 hiçbiri)
+            - inserted: eklenen satır sayısı
+            - failed: başarısız satır sayısı
+            - results: [{"index", "success", "id", "category"} | {"index", "success", "error"}]
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        return {
+            "success": False,
+            "status_code": 500,
+            "error": "SUPABASE_URL or SUPABASE_SERVICE_KEY not configured"
+        }
+
+    if not listings:
+        return {
+            "success": False,
+            "status_code": 400,
+            "error": "No listings provided"
+        }
+
+    if len(listings) > BULK_INSERT_MAX_ITEMS:
+        return {
+            "success": False,
+            "status_code": 400,
+            "error": f"Too many listings: {len(listings)} (max {BULK_INSERT_MAX_ITEMS})"
+        }
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(listings)
+    pending: List[tuple] = []  # (index, row)
+
+    # 1) Validation + kategori: tek geçiş (batch keyword matcher), I/O yok
+    valid = []
+    for index, item in enumerate(listings):
+        if not isinstance(item, dict) or not item.get("title"):
+            results[index] = {"index": index, "success": False, "error": "title is required"}
+            continue
+        valid.append((index, item))
+
+    suggestions = suggest_categories(
+        (item["title"], item.get("description"), (item.get("category") or "").strip() or None)
+        for _, item in valid
+    )
+    for (index, item), suggestion in zip(valid, suggestions):
+        pending.append((index, _prepare_row(item, suggestion)))
+
+    url = f"{SUPABASE_URL}/rest/v1/listings"
+    headers = {
+        "Content-Type": "application/json",
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "Prefer": "return=representation",
+    }
+    client = get_client()
+    touched = set()
+
+    # 2) Chunk'lar halinde array POST
+    for start in range(0, len(pending), BULK_INSERT_CHUNK_SIZE):
+        chunk = pending[start:start + BULK_INSERT_CHUNK_SIZE]
+        try:
+            response = await _post(client, url, headers, [row for _, row in chunk])
+        except httpx.HTTPError as e:
+            for index, _ in chunk:
+                results[index] = {"index": index, "success": False, "error": f"Connection error: {str(e)}"}
+            continue
+
+        if response.is_success:
+            created = response.json() if response.text else []
+            for offset, (index, row) in enumerate(chunk):
+                record = created[offset] if offset < len(created) else {}
+                notify_listing_upsert(record)
+                results[index] = {
+                    "index": index,
+                    "success": True,
+                    "id": record.get("id"),
+                    "category": row["category"],
+                }
+                touched.add((row["category"], row["location"]))
+            continue
+
+        if response.status_code >= 500 or len(chunk) == 1:
+            for index, _ in chunk:
+                results[index] = {
+                    "index": index,
+                    "success": False,
+                    "error": f"Supabase error: {response.text}",
+                }
+            continue
+
+        # 3) Chunk reddedildi (ör. constraint ihlali) → hatalı satırları ayır
+        print(f"⚠️ Bulk chunk rejected ({response.status_code}), retrying {len(chunk)} rows individually")
+        for index, row in chunk:
+            try:
+                single = await _post(client, url, headers, [row])
+            except httpx.HTTPError as e:
+                results[index] = {"index": index, "success": False, "error": f"Connection error: {str(e)}"}
+                continue
+            if single.is_success:
+                created = single.json() if single.text else []
+                notify_listing_upsert(created[0] if created else None)
+                results[index] = {
+                    "index": index,
+                    "success": True,
+                    "id": created[0].get("id") if created else None,
+                    "category": row["category"],
+                }
+                touched.add((row["category"], row["location"]))
+            else:
+                results[index] = {
+                    "index": index,
+                    "success": False,
+                    "error": f"Supabase error: {single.text}",
+                }
+
+    for category, location in touched:
+        await invalidate_for_listing({"category": category, "location": location})
+
+    inserted = sum(1 for r in results if r and r["success"])
+    failed = len(results) - inserted
+    if failed == 0:
+        status_code = 201
+    elif inserted == 0:
+        status_code = 400
+    else:
+        status_code = 207
+
+    return {
+        "success": failed == 0,
+        "status_code": status_code,
+        "inserted": inserted,
+        "failed": failed,
+        "results": results,
+    }
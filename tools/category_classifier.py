@@ -0,0 +1,190 @@
+"""
+Trainable category classifier (multinomial naive Bayes, char n-grams)
+
+Keyword sayımından daha isabetli kategori tahmini için hafif, offline bir model.
+Supabase'ten export edilen ilanlarla eğitilir (train_category_model.py) ve
+memory-mappable .npy dosyaları olarak saklanır:
+
+    models/category_nb/
+        meta.json        # sınıflar, n-gram ayarları, boyut
+        log_prior.npy    # (n_classes,) float32
+        log_prob.npy     # (n_features, n_classes) float32, mmap ile okunur
+
+Özellikler: kelime unigram'ları + 3-5 karakter n-gram'ları, crc32 ile
+N_FEATURES boyuta hash'lenir (vocab dosyası yok, deterministic).
+
+Env:
+    CATEGORY_MODEL_PATH: model klasörü (default: models/category_nb)
+    CATEGORY_CLASSIFIER: "auto" (model varsa kullan), "model" veya "keyword"
+    CATEGORY_MODEL_MIN_CONFIDENCE: bu olasılığın altında keyword skoruna düşülür
+"""
+import json
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy yoksa keyword skoru kullanılır
+    np = None  # type: ignore
+
+CATEGORY_MODEL_PATH = os.getenv(
+    "CATEGORY_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "category_nb"),
+)
+CATEGORY_CLASSIFIER = os.getenv("CATEGORY_CLASSIFIER", "auto").lower()
+CATEGORY_MODEL_MIN_CONFIDENCE = float(os.getenv("CATEGORY_MODEL_MIN_CONFIDENCE", "0.5"))
+
+N_FEATURES = 1 << 16
+NGRAM_RANGE = (3, 5)
+ALPHA = 0.1  # Laplace/Lidstone smoothing
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    # Türkçe büyük I/İ → ı/i
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def featurize(text: str, n_features: int = N_FEATURES, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> List[int]:
+    """
+    Metni hash'lenmiş özellik index'lerine çevirir (tekrarlar sayım olarak kalır).
+    """
+    tokens = _TOKEN_RE.findall(_normalize(text))
+    features = []
+    low, high = ngram_range
+    for token in tokens:
+        features.append(zlib.crc32(b"w:" + token.encode()) % n_features)
+        padded = f" {token} ".encode()
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                features.append(zlib.crc32(padded[i:i + n]) % n_features)
+    return features
+
+
+class NaiveBayesCategoryClassifier:
+    """Multinomial naive Bayes over hashed char n-grams (NumPy-vectorized)"""
+
+    def __init__(self, classes: Sequence[str], log_prior, log_prob,
+                 n_features: int = N_FEATURES, ngram_range: Tuple[int, int] = NGRAM_RANGE):
+        self.classes = list(classes)
+        self.log_prior = log_prior
+        self.log_prob = log_prob
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    # ---------------------------------------------------------------- training
+
+    @classmethod
+    def fit(cls, texts: Iterable[str], labels: Iterable[str], alpha: float = ALPHA,
+            n_features: int = N_FEATURES, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> "NaiveBayesCategoryClassifier":
+        if np is None:
+            raise ImportError("numpy paketi yüklü değil. 'pip install numpy' çalıştırın.")
+        texts = list(texts)
+        labels = list(labels)
+        classes = sorted(set(labels))
+        class_index = {label: i for i, label in enumerate(classes)}
+
+        counts = np.zeros((len(classes), n_features), dtype=np.float64)
+        class_docs = np.zeros(len(classes), dtype=np.float64)
+        for text, label in zip(texts, labels):
+            row = class_index[label]
+            np.add.at(counts[row], featurize(text, n_features, ngram_range), 1.0)
+            class_docs[row] += 1
+
+        smoothed = counts + alpha
+        log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+        log_prior = np.log(class_docs / class_docs.sum())
+        # (n_features, n_classes): bir özelliğin tüm sınıf skorları tek satırda (mmap dostu)
+        return cls(classes, log_prior.astype(np.float32),
+                   np.ascontiguousarray(log_prob.T, dtype=np.float32),
+                   n_features, ngram_range)
+
+    # ---------------------------------------------------------------- inference
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        features = featurize(text, self.n_features, self.ngram_range)
+        scores = self.log_prior.astype(np.float64)
+        if features:
+            scores = scores + self.log_prob[features].sum(axis=0, dtype=np.float64)
+        scores -= scores.max()
+        probs = np.exp(scores)
+        probs /= probs.sum()
+        return {label: float(p) for label, p in zip(self.classes, probs)}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        (en olası kategori, olasılık)
+        """
+        features = featurize(text, self.n_features, self.ngram_range)
+        scores = self.log_prior.astype(np.float64)
+        if features:
+            scores = scores + self.log_prob[features].sum(axis=0, dtype=np.float64)
+        best = int(scores.argmax())
+        probs = np.exp(scores - scores[best])
+        return self.classes[best], float(1.0 / probs.sum())
+
+    # ---------------------------------------------------------------- persistence
+
+    def save(self, path: str = CATEGORY_MODEL_PATH) -> None:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "log_prior.npy"), self.log_prior)
+        np.save(os.path.join(path, "log_prob.npy"), self.log_prob)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "classes": self.classes,
+                "n_features": self.n_features,
+                "ngram_range": list(self.ngram_range),
+            }, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str = CATEGORY_MODEL_PATH) -> "NaiveBayesCategoryClassifier":
+        if np is None:
+            raise ImportError("numpy paketi yüklü değil. 'pip install numpy' çalıştırın.")
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            meta["classes"],
+            np.load(os.path.join(path, "log_prior.npy")),
+            np.load(os.path.join(path, "log_prob.npy"), mmap_mode="r"),
+            meta["n_features"],
+            tuple(meta["ngram_range"]),
+        )
+
+
+_classifier: Optional[NaiveBayesCategoryClassifier] = None
+_classifier_loaded = False
+
+
+def get_classifier() -> Optional[NaiveBayesCategoryClassifier]:
+    """
+    Modeli ilk çağrıda yükler (lazy). Model yoksa / devre dışıysa None.
+    """
+    global _classifier, _classifier_loaded
+    if _classifier_loaded:
+        return _classifier
+    _classifier_loaded = True
+    if CATEGORY_CLASSIFIER == "keyword" or np is None:
+        return None
+    if not os.path.exists(os.path.join(CATEGORY_MODEL_PATH, "meta.json")):
+        if CATEGORY_CLASSIFIER == "model":
+            print(f"⚠️ Category model not found at {CATEGORY_MODEL_PATH}, using keyword scorer")
+        return None
+    try:
+        _classifier = NaiveBayesCategoryClassifier.load(CATEGORY_MODEL_PATH)
+        print(f"🧠 Category model loaded ({len(_classifier.classes)} classes)")
+    except Exception as e:
+        print(f"⚠️ Category model could not be loaded: {e}")
+        _classifier = None
+    return _classifier
+
+
+def set_classifier(classifier: Optional[NaiveBayesCategoryClassifier]) -> None:
+    """
+    Aktif modeli değiştirir (None → keyword skoru).
+    """
+    global _classifier, _classifier_loaded
+    _classifier = classifier
+    _classifier_loaded = True
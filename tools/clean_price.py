@@ -1,10 +1,14 @@
 # tools/clean_price.py
 
 import re
-from typing import Optional, Dict
+from decimal import Decimal
+from typing import Any, Optional, Dict
 
+from .registry import tool
 
-def clean_price(price_text: Optional[str]) -> Dict[str, Optional[int]]:
+
+@tool("clean_price_tool", "Fiyat metnini temizler ve sayısal değeri döndürür")
+def clean_price(price_text: Optional[str] = None) -> Dict[str, Optional[int]]:
     """
     Türkçe fiyat formatlarını temizler:
     - "22 bin" → 22000
@@ -48,3 +52,60 @@ def clean_price(price_text: Optional[str]) -> Dict[str, Optional[int]]:
         return {"clean_price": None}
     
     return {"clean_price": number}
+
+
+# coerce_price: metindeki tek sayı ve opsiyonel "bin"/"milyon" çarpanı
+_PRICE_NUMBER = re.compile(r"\d[\d.,]*")
+_PRICE_MULTIPLIERS = {"bin": 1_000, "milyon": 1_000_000}
+# Sayıya bitişik ("22bin") veya boşluklu ("22 bin"); başka kelimenin parçası değil ("kabin", "binlik")
+_PRICE_MULTIPLIER = re.compile(r"(?<![^\W\d_])(bin|milyon)\b")
+# Binlik gruplu ("1.250.000") veya düz tam kısım + opsiyonel 1-2 haneli ondalık ("45000.50", "1.250,00")
+_PRICE_AMOUNT = re.compile(r"(?P<int>\d+|\d{1,3}(?P<group>[.,])\d{3}(?:(?P=group)\d{3})*)(?:(?P<dec>[.,])(?P<frac>\d{1,2}))?")
+# Çarpanla: tek ayraç ondalıktır ("1,5 milyon", "2.5 bin")
+_PRICE_SCALED = re.compile(r"(?P<int>\d+)(?:[.,](?P<frac>\d+))?")
+
+
+def _parse_price_text(text: str) -> Decimal:
+    lowered = text.lower()
+    numbers = _PRICE_NUMBER.findall(lowered)
+    multipliers = _PRICE_MULTIPLIER.findall(lowered)
+    if len(numbers) != 1 or len(multipliers) > 1:
+        raise ValueError(f"could not parse price {text!r:.40}")
+    token = numbers[0].rstrip(".,")
+
+    if multipliers:
+        match = _PRICE_SCALED.fullmatch(token)
+        # "1.250 bin": binlik grup mu (1.250.000) ondalık mı (1.250)? Tahmin etme
+        if match is None or (match.group("frac") is not None and len(match.group("frac")) == 3):
+            raise ValueError(f"ambiguous price {text!r:.40}")
+        number = Decimal(f"{match.group('int')}.{match.group('frac') or 0}")
+        return number * _PRICE_MULTIPLIERS[multipliers[0]]
+
+    match = _PRICE_AMOUNT.fullmatch(token)
+    if match is None or (match.group("group") and match.group("group") == match.group("dec")):
+        raise ValueError(f"ambiguous price {text!r:.40}")
+    integer = match.group("int").replace(",", "").replace(".", "")
+    return Decimal(f"{integer}.{match.group('frac') or 0}")
+
+
+def coerce_price(value: Any) -> Any:
+    """
+    Tool argümanı olarak gelen fiyatı int'e (TL) çevirir:
+    - "45.000" / "54,999 TL" / "1.250.000" → binlik ayraç
+    - "45000.50" / "1.250,00" → sondaki 1-2 hane ondalık
+    - "22 bin" / "1,5 milyon" / "2.5 bin" → çarpanla tek ayraç ondalık
+    int/None olduğu gibi döner. Belirsiz metin ("1.2345", "1.250 bin"),
+    birden fazla sayı veya tam sayıya denk gelmeyen tutar → ValueError
+    (clean_price'ın aksine ayraçlar körlemesine silinmez; yazma yolunda
+    yanlış fiyat yerine hata döner).
+    """
+    if isinstance(value, str):
+        if not value.strip():
+            return None
+        amount = _parse_price_text(value)
+        if amount != amount.to_integral_value():
+            raise ValueError(f"price must be a whole number of TL, got {value!r:.40}")
+        return int(amount)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
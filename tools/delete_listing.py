@@ -3,10 +3,15 @@ Delete a listing from Supabase
 """
 import os
 import httpx
+from .embedding_worker import notify_listing_delete
+from .registry import tool
+from .search_cache import invalidate_for_listing
+from .supabase_client import WRITE_TIMEOUT, get_client
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
+@tool("delete_listing_tool", "İlanı siler")
 async def delete_listing(listing_id: str) -> dict:
     """
     Delete a listing from Supabase by listing_id.
@@ -37,31 +42,36 @@ async def delete_listing(listing_id: str) -> dict:
     url = f"{SUPABASE_URL}/rest/v1/listings"
     
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            # Supabase delete with filter: DELETE /listings?id=eq.{listing_id}
-            response = await client.delete(
-                f"{url}?id=eq.{listing_id}",
-                headers=headers
-            )
-            
-            if response.status_code in [200, 204]:
-                return {
-                    "success": True,
-                    "status_code": response.status_code,
-                    "message": f"Listing {listing_id} deleted successfully"
-                }
-            elif response.status_code == 404:
-                return {
-                    "success": False,
-                    "status_code": 404,
-                    "error": f"Listing {listing_id} not found"
-                }
-            else:
-                return {
-                    "success": False,
-                    "status_code": response.status_code,
-                    "error": f"Supabase error: {response.text}"
-                }
+        client = get_client()
+        # Supabase delete with filter: DELETE /listings?id=eq.{listing_id}
+        response = await client.delete(
+            f"{url}?id=eq.{listing_id}",
+            headers=headers,
+            timeout=WRITE_TIMEOUT,
+        )
+        
+        if response.status_code in [200, 204]:
+            # return=representation → silinen satırın category/location'ı
+            deleted = response.json() if response.text else None
+            await invalidate_for_listing(deleted[0] if deleted else None)
+            notify_listing_delete(listing_id)
+            return {
+                "success": True,
+                "status_code": response.status_code,
+                "message": f"Listing {listing_id} deleted successfully"
+            }
+        elif response.status_code == 404:
+            return {
+                "success": False,
+                "status_code": 404,
+                "error": f"Listing {listing_id} not found"
+            }
+        else:
+            return {
+                "success": False,
+                "status_code": response.status_code,
+                "error": f"Supabase error: {response.text}"
+            }
                 
     except httpx.ConnectError as e:
         return {
@@ -0,0 +1,268 @@
+"""
+Background embedding pipeline: keeps product_embeddings in sync with listings
+
+Listing tool'ları (insert/bulk_insert/update/delete) sadece olay kuyruğa
+bırakır (put_nowait, I/O yok); embedding istek yolunda hiç beklenmez.
+Worker olayları EMBEDDING_BATCH_SIZE'lık batch'ler halinde toplar, tek
+embed çağrısıyla vektörleri üretir ve product_embeddings'e toplu upsert eder.
+
+- Bounded queue: istek yolunda kuyruk doluysa olay düşürülür (dropped sayacı,
+  backfill ile telafi edilir); backfill ise await put() ile backpressure uygular
+- Retry: başarısız batch exponential backoff ile EMBEDDING_MAX_RETRIES kez denenir
+- Throttle: batch'ler arası en az EMBEDDING_MIN_INTERVAL_MS beklenir
+
+Lifecycle server.py lifespan'ından yönetilir (start / stop).
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from .embeddings import get_embedder, listing_text, to_pgvector
+from .pagination import apply_cursor, next_cursor
+from .supabase_client import READ_TIMEOUT, WRITE_TIMEOUT, get_client
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+
+EMBEDDING_QUEUE_SIZE = int(os.getenv("EMBEDDING_QUEUE_SIZE", "2000"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_BATCH_WAIT_MS = int(os.getenv("EMBEDDING_BATCH_WAIT_MS", "500"))
+EMBEDDING_MIN_INTERVAL_MS = int(os.getenv("EMBEDDING_MIN_INTERVAL_MS", "0"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+EMBEDDING_WORKER_ENABLED = os.getenv("EMBEDDING_WORKER", "1") not in ("0", "false", "False")
+
+# Olay: ("upsert", listing_id, text) veya ("delete", listing_id, None)
+Event = Tuple[str, str, Optional[str]]
+
+
+class EmbeddingWorker:
+    """Batching consumer for listing change events"""
+
+    def __init__(self, queue_size: int = EMBEDDING_QUEUE_SIZE, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_flush = 0.0
+        self.enqueued = 0
+        self.dropped = 0
+        self.upserted = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------------------------------------------------------------- producers
+
+    def submit(self, event: Event) -> bool:
+        """
+        İstek yolundan çağrılır: asla beklemez. Kuyruk doluysa olay düşürülür.
+        """
+        if not self.running:
+            return False
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def put(self, event: Event) -> None:
+        """
+        Backfill için: kuyruk doluysa bekler (backpressure, bounded memory).
+        """
+        await self.queue.put(event)
+        self.enqueued += 1
+
+    # ---------------------------------------------------------------- consumer
+
+    async def start(self) -> None:
+        if not EMBEDDING_WORKER_ENABLED or self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="embedding-worker")
+        print(f"🧠 Embedding worker started (batch={self.batch_size}, queue={self.queue_size})")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Kuyruktaki olayları timeout süresince boşaltmaya çalışır, sonra worker'ı durdurur.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Embedding worker stopped with {self.queue.qsize()} pending events")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _collect(self) -> List[Event]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + EMBEDDING_BATCH_WAIT_MS / 1000
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            try:
+                # Throttle: batch'ler arası minimum aralık
+                wait = self._last_flush + EMBEDDING_MIN_INTERVAL_MS / 1000 - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                await self._flush_with_retry(batch)
+            except Exception as e:
+                print(f"❌ Embedding batch failed: {type(e).__name__}: {str(e)}")
+            finally:
+                self._last_flush = time.monotonic()
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _flush_with_retry(self, batch: List[Event]) -> None:
+        # Aynı ilan için son olay geçerli; delete bekleyen upsert'i iptal eder
+        latest: Dict[str, Event] = {}
+        for event in batch:
+            latest[event[1]] = event
+        upserts = [(listing_id, text) for kind, listing_id, text in latest.values() if kind == "upsert" and text]
+        if not upserts:
+            return
+
+        for attempt in range(EMBEDDING_MAX_RETRIES):
+            try:
+                await self._flush(upserts)
+                self.upserted += len(upserts)
+                self.batches += 1
+                return
+            except Exception as e:
+                # 4xx kalıcı hatadır (ör. ilan bu arada silindi → FK ihlali): retry yok
+                permanent = isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500
+                if permanent and len(upserts) > 1:
+                    await self._flush_individually(upserts)
+                    return
+                if permanent or attempt == EMBEDDING_MAX_RETRIES - 1:
+                    self.failed += len(upserts)
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                print(f"⚠️ Embedding batch retry {attempt + 1} in {delay}s: {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def _flush_individually(self, upserts: List[Tuple[str, str]]) -> None:
+        for upsert in upserts:
+            try:
+                await self._flush([upsert])
+                self.upserted += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Embedding upsert failed for listing {upsert[0]}: {str(e)}")
+        self.batches += 1
+
+    async def _flush(self, upserts: List[Tuple[str, str]]) -> None:
+        vectors = await get_embedder().embed([text for _, text in upserts])
+        rows = [
+            {"listing_id": listing_id, "embedding": to_pgvector(vector)}
+            for (listing_id, _), vector in zip(upserts, vectors)
+        ]
+        client = get_client()
+        response = await client.post(
+            f"{SUPABASE_URL}/rest/v1/product_embeddings",
+            params={"on_conflict": "listing_id"},
+            json=rows,
+            headers={
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+                "Content-Type": "application/json",
+                "Prefer": "resolution=merge-duplicates,return=minimal",
+            },
+            timeout=WRITE_TIMEOUT,
+        )
+        response.raise_for_status()
+
+    # ---------------------------------------------------------------- backfill
+
+    async def backfill(self, page_size: int = 500) -> int:
+        """
+        Tüm aktif ilanları keyset sayfalama ile kuyruğa basar.
+        Bellek kullanımı sayfa + kuyruk boyutuyla sınırlıdır.
+        """
+        client = get_client()
+        headers = {
+            "apikey": SUPABASE_KEY,
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+        }
+        cursor: Optional[str] = None
+        total = 0
+        while True:
+            params: Dict[str, Any] = {
+                "select": "id,title,category,description,location,created_at",
+                "status": "eq.active",
+                "limit": page_size,
+            }
+            apply_cursor(params, cursor)
+            response = await client.get(
+                f"{SUPABASE_URL}/rest/v1/listings",
+                params=params,
+                headers=headers,
+                timeout=READ_TIMEOUT,
+            )
+            response.raise_for_status()
+            rows = response.json()
+            for row in rows:
+                await self.put(("upsert", row["id"], listing_text(row)))
+            total += len(rows)
+            cursor = next_cursor(rows, page_size)
+            if cursor is None:
+                return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "upserted": self.upserted,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+embedding_worker = EmbeddingWorker()
+
+
+def notify_listing_upsert(listing: Optional[Dict[str, Any]]) -> None:
+    """
+    insert/update sonrası çağrılır (Supabase'in döndürdüğü satır ile).
+    """
+    if not listing or not listing.get("id"):
+        return
+    text = listing_text(listing)
+    if text:
+        embedding_worker.submit(("upsert", str(listing["id"]), text))
+
+
+def notify_listing_delete(listing_id: str) -> None:
+    """
+    delete sonrası çağrılır. Satır ON DELETE CASCADE ile silinir;
+    olay sadece kuyruktaki bekleyen upsert'i iptal eder.
+    """
+    embedding_worker.submit(("delete", str(listing_id), None))
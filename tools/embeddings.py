@@ -0,0 +1,160 @@
+"""
+Pluggable text embedders for product_embeddings (vector(1536))
+
+Env:
+    EMBEDDER: "hashing" (default, offline + deterministic) veya "openai"
+    OPENAI_API_KEY / OPENAI_EMBEDDING_MODEL: openai embedder için
+    OPENAI_EMBEDDING_TIMEOUT: istek timeout'u, saniye (default: 60)
+    OPENAI_POOL_MAX_CONNECTIONS: OpenAI client bağlantı sınırı (default: 10)
+
+HashingEmbedder dış servis gerektirmez: kelime + karakter 3-gram'ları
+feature hashing ile 1536 boyuta dağıtılır ve L2 normalize edilir.
+Aynı metin her zaman aynı vektörü üretir (testler ve offline backfill için).
+"""
+import asyncio
+import hashlib
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+EMBEDDING_DIM = 1536  # product_embeddings.embedding vector(1536)
+
+EMBEDDER_NAME = os.getenv("EMBEDDER", "hashing").lower()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+OPENAI_EMBEDDING_TIMEOUT = httpx.Timeout(float(os.getenv("OPENAI_EMBEDDING_TIMEOUT", "60")), connect=5.0)
+OPENAI_POOL_MAX_CONNECTIONS = int(os.getenv("OPENAI_POOL_MAX_CONNECTIONS", "10"))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    # Türkçe büyük I/İ → ı/i (str.lower() "I" → "i" yapar)
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def listing_text(listing: Dict[str, Any]) -> str:
+    """
+    İlanın embed edilecek metni: title, category, description, location.
+    """
+    parts = [listing.get(field) for field in ("title", "category", "description", "location")]
+    return " ".join(str(part) for part in parts if part)
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder (no network, no model file)"""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(normalize_text(text))
+        features = [f"w:{token}" for token in tokens]
+        for token in tokens:
+            padded = f"#{token}#"
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            # Kelimeler karakter n-gram'larından daha ağır
+            vector[bucket] += sign * (2.0 if feature[0] == "w" else 1.0)
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            vector = [v / norm for v in vector]
+        return vector
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) == 1:
+            return [self.embed_one(texts[0])]
+        # Batch'ler CPU-bound: event loop'u bloklamamak için thread'de
+        return await asyncio.to_thread(lambda: [self.embed_one(text) for text in texts])
+
+
+class OpenAIEmbedder:
+    """
+    OpenAI embeddings API (text-embedding-3-small → 1536 dim).
+    Kendi httpx client'ını kullanır: yavaş embedding istekleri Supabase
+    pool'unun bağlantılarını ve timeout'larını paylaşmaz.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str], model: str):
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY tanımlı değil")
+        self.api_key = api_key
+        self.model = model
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=OPENAI_EMBEDDING_TIMEOUT,
+                limits=httpx.Limits(max_connections=OPENAI_POOL_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        resp = await self._get_client().post(
+            "https://api.openai.com/v1/embeddings",
+            json={"model": self.model, "input": texts},
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        resp.raise_for_status()
+        data = sorted(resp.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_embedder = None
+
+
+def get_embedder():
+    """
+    EMBEDDER env'ine göre embedder'ı döndürür (ilk çağrıda oluşturulur).
+    """
+    global _embedder
+    if _embedder is None:
+        if EMBEDDER_NAME == "openai":
+            _embedder = OpenAIEmbedder(OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
+        else:
+            _embedder = HashingEmbedder()
+    return _embedder
+
+
+def set_embedder(embedder) -> None:
+    """
+    Embedder'ı değiştirir (ör. farklı model, test).
+    """
+    global _embedder
+    _embedder = embedder
+
+
+async def close_embedder() -> None:
+    """
+    Server shutdown'da çağrılır - embedder'ın kendi HTTP client'ı varsa kapatır.
+    """
+    close = getattr(_embedder, "close", None)
+    if close is not None:
+        await close()
+
+
+def to_pgvector(vector: List[float]) -> str:
+    """
+    pgvector text formatı: "[0.1,0.2,...]"
+    """
+    return "[" + ",".join(f"{v:.6g}" for v in vector) + "]"
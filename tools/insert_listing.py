@@ -4,13 +4,19 @@ import os
 from typing import Any, Dict, Optional
 
 import httpx
+from .clean_price import coerce_price
 from .suggest_category import suggest_category
+from .embedding_worker import notify_listing_upsert
+from .registry import tool
+from .search_cache import invalidate_for_listing
+from .supabase_client import WRITE_TIMEOUT, get_client
 
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
 
+@tool("insert_listing_tool", "Yeni ilan ekler", coerce={"price": coerce_price})
 async def insert_listing(
     title: str,
     user_id: str = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11",  # Default test user for development
@@ -110,8 +116,8 @@ async def insert_listing(
         print(f"📡 Attempting POST to: {url}")
         print(f"📦 Payload: {payload}")
         
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            resp = await client.post(url, json=payload, headers=headers)
+        client = get_client()
+        resp = await client.post(url, json=payload, headers=headers, timeout=WRITE_TIMEOUT)
         
         print(f"✅ Response status: {resp.status_code}")
 
@@ -121,6 +127,13 @@ async def insert_listing(
         except Exception:
             data = resp.text
 
+        if resp.is_success:
+            # Yeni ilan bu category/location'daki cache'lenmiş aramaları bayatlatır
+            await invalidate_for_listing(payload)
+            # Embedding arka planda üretilir (istek yolunda beklenmez)
+            if isinstance(data, list) and data:
+                notify_listing_upsert(data[0])
+
         return {
             "success": resp.is_success,
             "status": resp.status_code,
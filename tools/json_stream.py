@@ -0,0 +1,87 @@
+"""
+Incremental JSON array parser for streamed PostgREST responses
+
+PostgREST bir sonuç setini tek bir JSON array olarak döndürür. Bu parser
+byte chunk'larını (httpx aiter_bytes) besleyip tamamlanan her elemanı
+hemen verir; tüm cevabın inmesi beklenmez.
+
+    parser = JSONArrayParser()
+    async for chunk in response.aiter_bytes():
+        for row in parser.feed(chunk):
+            ...
+    parser.close()
+"""
+import codecs
+import json
+from typing import Any, List
+
+_WHITESPACE = " \t\r\n"
+
+
+class JSONArrayParser:
+    """Yields top-level elements of a JSON array as they complete"""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Chunk'ı ekler, tamamlanan elemanları döndürür.
+        Geçersiz JSON'da ValueError.
+        """
+        self._buffer += self._utf8.decode(chunk)
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        """
+        Stream bitti: kalan elemanları döndürür; array kapanmadıysa ValueError.
+        """
+        self._buffer += self._utf8.decode(b"", final=True)
+        items = self._drain(final=True)
+        if not self._finished:
+            raise ValueError("Incomplete JSON array")
+        return items
+
+    def _drain(self, final: bool) -> List[Any]:
+        items: List[Any] = []
+        buffer = self._buffer
+        pos = 0
+        length = len(buffer)
+
+        while pos < length and not self._finished:
+            char = buffer[pos]
+            if char in _WHITESPACE:
+                pos += 1
+                continue
+            if not self._started:
+                if char != "[":
+                    raise ValueError(f"Expected JSON array, got {char!r}")
+                self._started = True
+                pos += 1
+                continue
+            if char == ",":
+                pos += 1
+                continue
+            if char == "]":
+                self._finished = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise ValueError("Invalid JSON array element") from None
+                break  # Eleman henüz tamamlanmadı: sonraki chunk'ı bekle
+            if end == length and not final and not isinstance(item, (dict, list)):
+                break  # Sayı/literal chunk sınırında kesilmiş olabilir ("12" → "123")
+            items.append(item)
+            pos = end
+
+        self._buffer = buffer[pos:]
+        if self._finished and self._buffer.strip():
+            raise ValueError("Unexpected data after JSON array")
+        return items
@@ -0,0 +1,91 @@
+"""
+Aho–Corasick multi-pattern keyword matcher
+
+Tüm anahtar kelimeler tek bir otomata derlenir; metin tek geçişte
+(O(len(text) + eşleşme sayısı)) taranır. suggest_category tarafından
+CATEGORY_KEYWORDS tablosu ile kullanılır.
+
+Kelime sınırı: eşleşme bir kelimenin başında başlamalıdır
+("ev" → "ev", "evler" eşleşir; "sevgi", "dev" eşleşmez). Sağ sınır
+aranmaz; Türkçe ekler ("arabası", "telefonu") eşleşmeyi bozmaz.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordMatcher:
+    """Compiled automaton for a {label: [keywords]} table"""
+
+    def __init__(self, table: Dict[str, Iterable[str]]):
+        # keyword_id → (label, original keyword, lowered length)
+        self.keywords: List[Tuple[str, str, int]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for label, words in table.items():
+            for word in words:
+                pattern = word.lower()
+                if not pattern:
+                    continue
+                self._add(pattern, len(self.keywords))
+                self.keywords.append((label, word, len(pattern)))
+        self._build_failure_links()
+
+    def _add(self, pattern: str, keyword_id: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(keyword_id)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> List[int]:
+        """
+        Metinde geçen (kelime başında başlayan) keyword_id'leri döndürür (tekrarsız).
+        text zaten lowercase olmalıdır.
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = set()
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            for keyword_id in out[state]:
+                start = index - self.keywords[keyword_id][2] + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    found.add(keyword_id)
+        return sorted(found)
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """
+        {label: [eşleşen keyword'ler]} - keyword'ler tablodaki sırayla.
+        """
+        matches: Dict[str, List[str]] = {}
+        for keyword_id in self.find(text.lower()):
+            label, word, _ = self.keywords[keyword_id]
+            matches.setdefault(label, []).append(word)
+        return matches
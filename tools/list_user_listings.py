@@ -3,15 +3,22 @@ List all listings for a specific user
 """
 import os
 import httpx
-from typing import Optional
+from typing import List, Optional, Union
+from .pagination import InvalidCursor, apply_cursor, next_cursor
+from .projection import build_select
+from .registry import tool
+from .supabase_client import READ_TIMEOUT, get_client
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
+@tool("list_user_listings_tool", "Kullanıcının tüm ilanlarını listeler")
 async def list_user_listings(
     user_id: str,
     status: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[Union[str, List[str]]] = None
 ) -> dict:
     """
     List all listings belonging to a specific user.
@@ -20,6 +27,9 @@ async def list_user_listings(
         user_id: User identifier (phone number or UUID)
         status: Optional filter by status: 'draft', 'active', 'sold', 'inactive'
         limit: Maximum number of listings to return (default: 50)
+        cursor: Opaque cursor from a previous page's next_cursor (optional)
+        fields: Columns to return - "summary" (default), "detail" (all columns)
+            or an explicit list like ["title", "price"] (optional)
     
     Returns:
         dict with:
@@ -27,6 +37,7 @@ async def list_user_listings(
             - status_code: int
             - listings: list of listing objects (if success)
             - count: number of listings found
+            - next_cursor: cursor for the next page (None on the last page)
             - error: error message (if failed)
     """
     if not SUPABASE_URL or not SUPABASE_KEY:
@@ -43,38 +54,59 @@ async def list_user_listings(
     
     url = f"{SUPABASE_URL}/rest/v1/listings"
     
+    try:
+        select = build_select(fields)
+    except ValueError as e:
+        return {
+            "success": False,
+            "status_code": 400,
+            "error": str(e)
+        }
+    
     # Build query params
     params = {
+        "select": select,
         "user_id": f"eq.{user_id}",
         "limit": limit,
-        "order": "created_at.desc"
     }
     
     if status:
         params["status"] = f"eq.{status}"
     
+    # Keyset pagination: order=created_at.desc,id.desc + cursor filter
+    try:
+        apply_cursor(params, cursor)
+    except InvalidCursor as e:
+        return {
+            "success": False,
+            "status_code": 400,
+            "error": str(e)
+        }
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(
-                url,
-                params=params,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                listings = response.json()
-                return {
-                    "success": True,
-                    "status_code": 200,
-                    "listings": listings,
-                    "count": len(listings)
-                }
-            else:
-                return {
-                    "success": False,
-                    "status_code": response.status_code,
-                    "error": f"Supabase error: {response.text}"
-                }
+        client = get_client()
+        response = await client.get(
+            url,
+            params=params,
+            headers=headers,
+            timeout=READ_TIMEOUT,
+        )
+        
+        if response.status_code == 200:
+            listings = response.json()
+            return {
+                "success": True,
+                "status_code": 200,
+                "listings": listings,
+                "count": len(listings),
+                "next_cursor": next_cursor(listings, limit)
+            }
+        else:
+            return {
+                "success": False,
+                "status_code": response.status_code,
+                "error": f"Supabase error: {response.text}"
+            }
                 
     except httpx.ConnectError as e:
         return {
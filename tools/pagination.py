@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination helpers for listings queries
+
+Cursor, sayfanın son satırının (created_at, id) ikilisini taşıyan opak bir
+base64 string'dir. Bir sonraki sayfa OFFSET yerine
+`(created_at, id) < (cursor.created_at, cursor.id)` koşuluyla okunur; böylece
+derin sayfalar da idx_listings_created_at üzerinden O(limit) kalır.
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Keyset sırası: created_at DESC, id DESC (id eşit zaman damgalarında tie-breaker)
+KEYSET_ORDER = "created_at.desc,id.desc"
+
+
+class InvalidCursor(ValueError):
+    """Cursor çözülemedi"""
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    if not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return created_at, row_id
+
+
+def apply_cursor(params: Dict[str, Any], cursor: Optional[str]) -> None:
+    """
+    PostgREST params'a keyset sırasını ve (varsa) cursor filtresini ekler.
+    Filtre `and=(...)` olarak eklenir; böylece mevcut `or=(...)` arama filtresiyle çakışmaz.
+    params'ta zaten bir `and=(...)` grubu varsa cursor koşulu o gruba eklenir.
+    """
+    params["order"] = KEYSET_ORDER
+    if not cursor:
+        return
+    created_at, row_id = decode_cursor(cursor)
+    # Değerler PostgREST reserved karakterleri (.,:) içerdiği için çift tırnakla yazılır
+    cursor_filter = (
+        f'or(created_at.lt."{created_at}",'
+        f'and(created_at.eq."{created_at}",id.lt."{row_id}"))'
+    )
+    existing = params.get("and")
+    params["and"] = f"{existing[:-1]},{cursor_filter})" if existing else f"({cursor_filter})"
+
+
+def next_cursor(rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """
+    Sayfa doluysa (len == limit) son satırdan bir sonraki cursor'ı üretir.
+    """
+    if not rows or len(rows) < int(limit):
+        return None
+    last = rows[-1]
+    if "created_at" not in last or "id" not in last:
+        return None
+    return encode_cursor(last)
@@ -0,0 +1,56 @@
+"""
+Column projection (PostgREST select=) for listings queries
+
+- "summary": WhatsApp özeti için gereken kolonlar (default)
+- "detail": tüm kolonlar (description + metadata JSONB dahil)
+- açık liste: ["title", "price"] veya "title,price"
+
+id ve created_at her zaman eklenir (keyset cursor için gerekli).
+"""
+from typing import List, Optional, Union
+
+LISTING_COLUMNS = {
+    "id", "user_id", "title", "description", "category", "price", "stock",
+    "location", "status", "created_at", "updated_at", "view_count",
+    "market_price_at_publish", "last_price_check_at", "condition",
+    "image_url", "metadata",
+}
+
+# Cursor'ın ihtiyaç duyduğu kolonlar
+REQUIRED_COLUMNS = ["id", "created_at"]
+
+VIEWS = {
+    "summary": "id,title,price,location,category,condition,status,image_url,created_at",
+    # "*" değil: search_vector (tsvector) gibi iç kolonlar gönderilmez
+    "detail": "id,user_id,title,description,category,price,stock,location,status,created_at,"
+              "updated_at,view_count,market_price_at_publish,last_price_check_at,condition,image_url,metadata",
+}
+
+DEFAULT_VIEW = "summary"
+
+
+def build_select(fields: Optional[Union[str, List[str]]] = None) -> str:
+    """
+    fields → PostgREST select= değeri.
+    Bilinmeyen kolon ValueError fırlatır.
+    """
+    if not fields:
+        return VIEWS[DEFAULT_VIEW]
+
+    if isinstance(fields, str):
+        if fields in VIEWS:
+            return VIEWS[fields]
+        fields = fields.split(",")
+
+    columns = [c.strip() for c in fields if c and c.strip()]
+    unknown = [c for c in columns if c not in LISTING_COLUMNS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. "
+            f"Use 'summary', 'detail' or columns from: {', '.join(sorted(LISTING_COLUMNS))}"
+        )
+
+    for column in REQUIRED_COLUMNS:
+        if column not in columns:
+            columns.append(column)
+    return ",".join(columns)
@@ -0,0 +1,213 @@
+"""
+Local rate limiter in front of the check_rate_limit RPC
+
+Her (user_id, action) için günlük pencere (rate_limits tablosu) process
+içinde tutulur:
+
+- İlk istek (veya pencere dolunca) check_rate_limit RPC'sine gider: bu hem
+  yetkili kontrolü hem de sayacı local state'e seed eder
+- Sonraki istekler local olarak karar verilir; limit aşımı hiç I/O yapmaz
+- Kabul edilen istekler pending sayacına yazılır ve RATE_LIMIT_SYNC_INTERVAL_MS
+  aralıklarla tek apply_rate_limit_increments RPC'siyle toplu gönderilir.
+  RPC dönen güncel sayaçlar (diğer worker'ların artışları dahil) local
+  state'e geri yazılır; worker'lar arası fazla kabul en fazla bir sync
+  aralığıyla sınırlıdır
+
+Env:
+    RATE_LIMIT_MODE: "local" (default) veya "remote" (her istekte RPC)
+    RATE_LIMIT_SYNC_INTERVAL_MS: toplu sync aralığı (default: 1000)
+    RATE_LIMIT_MAX_KEYS: local state kapasitesi (default: 10000)
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+RATE_LIMIT_MODE = os.getenv("RATE_LIMIT_MODE", "local").lower()
+RATE_LIMIT_SYNC_INTERVAL_MS = int(os.getenv("RATE_LIMIT_SYNC_INTERVAL_MS", "1000"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+LimitKey = Tuple[str, str]  # (user_id, action)
+
+# check_rate_limit RPC satırı: {allowed, current_count, max_allowed, resets_at}
+RemoteCheck = Callable[[str, str, str, int], Awaitable[Optional[Dict[str, Any]]]]
+# apply_rate_limit_increments: [{user_id, action, window_end, delta}] → [{user_id, action, window_end, current_count}]
+RemoteSync = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+
+def _monotonic_deadline(timestamp: str) -> Optional[float]:
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return time.monotonic() + (moment - datetime.now(timezone.utc)).total_seconds()
+
+
+class _Window:
+    __slots__ = ("count", "max_allowed", "window_end", "deadline", "pending")
+
+    def __init__(self, count: int, max_allowed: int, window_end: str, deadline: float):
+        self.count = count
+        self.max_allowed = max_allowed
+        self.window_end = window_end
+        self.deadline = deadline
+        self.pending = 0
+
+
+class LocalRateLimiter:
+    """Per-process window counters with batched write-behind to Supabase"""
+
+    def __init__(self, remote_check: RemoteCheck, remote_sync: RemoteSync,
+                 sync_interval_ms: int = RATE_LIMIT_SYNC_INTERVAL_MS,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.remote_check = remote_check
+        self.remote_sync = remote_sync
+        self.sync_interval = sync_interval_ms / 1000
+        self.max_keys = max_keys
+        self._windows: "OrderedDict[LimitKey, _Window]" = OrderedDict()
+        # Yerine yenisi konmuş pencerelerin sync edilmemiş artışları
+        self._stale: List[Tuple[LimitKey, _Window]] = []
+        self._sync_task: Optional[asyncio.Task] = None
+        self.local_allowed = 0
+        self.local_rejected = 0
+        self.remote_checks = 0
+        self.syncs = 0
+        self.sync_failures = 0
+
+    async def check(self, user_id: str, phone: str, action: str, max_allowed: int) -> Optional[Dict[str, Any]]:
+        """
+        check_rate_limit RPC ile aynı sonucu döndürür:
+        {allowed, current_count, max_allowed, resets_at} (RPC sonuç vermezse None)
+        """
+        key = (user_id, action)
+        window = self._windows.get(key)
+        if window is not None and window.deadline <= time.monotonic():
+            # Pencere doldu: pending artışlar eski pencereye ait, sync'e bırak
+            window = None
+
+        if window is None:
+            return await self._check_remote(key, phone, max_allowed)
+
+        self._windows.move_to_end(key)
+        if window.count >= window.max_allowed:
+            self.local_rejected += 1
+            return self._result(False, window)
+
+        window.count += 1
+        window.pending += 1
+        self.local_allowed += 1
+        self._schedule_sync()
+        return self._result(True, window)
+
+    async def _check_remote(self, key: LimitKey, phone: str, max_allowed: int) -> Optional[Dict[str, Any]]:
+        self.remote_checks += 1
+        row = await self.remote_check(key[0], phone, key[1], max_allowed)
+        if not row:
+            return row
+        deadline = _monotonic_deadline(row["resets_at"])
+        if deadline is not None:
+            current = self._windows.get(key)
+            if current is not None and current.window_end == row["resets_at"]:
+                # Eşzamanlı seed: aynı pencere, büyük sayaç kazanır
+                current.count = max(current.count, row["current_count"])
+            else:
+                self._store(key, _Window(row["current_count"], row["max_allowed"], row["resets_at"], deadline))
+        return row
+
+    def _store(self, key: LimitKey, window: _Window) -> None:
+        old = self._windows.pop(key, None)
+        if old is not None and old.pending:
+            self._stale.append((key, old))
+        self._windows[key] = window
+        if len(self._windows) > self.max_keys:
+            for evict_key in [k for k, w in self._windows.items() if not w.pending][:len(self._windows) - self.max_keys]:
+                del self._windows[evict_key]
+
+    @staticmethod
+    def _result(allowed: bool, window: _Window) -> Dict[str, Any]:
+        return {
+            "allowed": allowed,
+            "current_count": window.count,
+            "max_allowed": window.max_allowed,
+            "resets_at": window.window_end,
+        }
+
+    # ---------------------------------------------------------------- sync
+
+    def _schedule_sync(self) -> None:
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._delayed_sync(), name="rate-limit-sync")
+
+    async def _delayed_sync(self) -> None:
+        # Sync sırasında gelen (veya hata sonrası geri yazılan) artışlar için devam et
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.flush()
+            if not self._has_pending():
+                return
+
+    def _has_pending(self) -> bool:
+        return bool(self._stale) or any(window.pending for window in self._windows.values())
+
+    async def flush(self) -> None:
+        """
+        Bekleyen artışları tek RPC ile gönderir (shutdown'da da çağrılır).
+        Hata olursa artışlar geri yazılır ve sonraki sync'te tekrar denenir.
+        """
+        batch: List[Tuple[LimitKey, _Window, int]] = []
+        for key, window in list(self._windows.items()) + self._stale:
+            if window.pending:
+                batch.append((key, window, window.pending))
+                window.pending = 0
+        self._stale.clear()
+        if not batch:
+            return
+
+        increments = [
+            {"user_id": key[0], "action": key[1], "window_end": window.window_end, "delta": delta}
+            for key, window, delta in batch
+        ]
+        try:
+            rows = await self.remote_sync(increments)
+        except BaseException as e:
+            for key, window, delta in batch:
+                window.pending += delta
+                if self._windows.get(key) is not window:
+                    self._stale.append((key, window))
+            if not isinstance(e, Exception):
+                raise  # CancelledError: artışlar geri yazıldı, close() tekrar dener
+            self.sync_failures += 1
+            print(f"⚠️ Rate limit sync failed ({len(batch)} keys): {str(e)}")
+            return
+
+        self.syncs += 1
+        totals = {(row["user_id"], row["action"]): row["current_count"] for row in rows or []}
+        for key, window, _ in batch:
+            if key in totals and self._windows.get(key) is window:
+                # DB sayacı diğer worker'ların artışlarını da içerir
+                window.count = max(window.count, totals[key] + window.pending)
+
+    async def close(self) -> None:
+        if self._sync_task is not None and not self._sync_task.done():
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": RATE_LIMIT_MODE,
+            "keys": len(self._windows),
+            "pending": sum(window.pending for window in self._windows.values()),
+            "local_allowed": self.local_allowed,
+            "local_rejected": self.local_rejected,
+            "remote_checks": self.remote_checks,
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+        }
@@ -0,0 +1,457 @@
+"""
+Tool registry: MCP tool schemas and argument validators derived from signatures
+
+Her tool fonksiyonu kendi modülünde @tool ile kaydedilir (FastMCP'nin
+@mcp.tool() kullanımı gibi). Kayıt anında bir kez:
+
+- inputSchema type hint'lerden üretilir (Optional → required değil,
+  default'lar schema'ya yazılır); parametre açıklamaları docstring'in
+  Args: bölümünden alınır
+- Her parametre için bir validator + coercer derlenir; tools/call
+  argümanları fonksiyona (ve network'e) gitmeden kontrol edilir:
+  bilinmeyen key'ler atılır, tipi uymayan değerler dönüştürülmeye
+  çalışılır ("10" → 10, "true" → True, "" → None), dönüşmeyenler
+  TypeError yerine okunur bir hatayla reddedilir
+- Tool'a özel coercer'lar (ör. fiyat metni → coerce_price) @tool(coerce=...)
+  ile verilir ve her çağrıda uygulanır
+
+server.py dispatch'i tool_registry.get(name) ile yapar; yeni tool eklemek
+için fonksiyonu @tool ile işaretleyip modülünü import etmek yeterli.
+
+    @tool("delete_listing_tool", "İlanı siler")
+    async def delete_listing(listing_id: str) -> dict:
+        ...
+"""
+import inspect
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+
+Check = Callable[[Any], bool]
+Coercer = Callable[[Any], Any]
+
+_JSON_TYPE_NAMES = {
+    str: "string",
+    bool: "boolean",
+    int: "integer",
+    float: "number",
+    list: "array",
+    dict: "object",
+    type(None): "null",
+}
+
+_ARGS_ENTRY = re.compile(r"^ {4}(\w+)(?: \([^)]*\))?:\s*(.*)$")
+
+
+class ToolArgumentError(ValueError):
+    """tools/call argümanları tool'un signature'ına uymuyor"""
+
+
+def _any(value: Any) -> bool:
+    return True
+
+
+def _is_str(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def _is_bool(value: Any) -> bool:
+    return isinstance(value, bool)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_dict(value: Any) -> bool:
+    return isinstance(value, dict)
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, str):
+        return int(value.strip())
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError
+
+
+def _to_number(value: Any) -> float:
+    if isinstance(value, str):
+        return float(value.strip())
+    raise ValueError
+
+
+_TRUE = frozenset(("true", "1", "yes", "evet"))
+_FALSE = frozenset(("false", "0", "no", "hayır", "hayir"))
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+    elif value in (0, 1):
+        return bool(value)
+    raise ValueError
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError
+
+
+_COERCERS: Dict[Any, Coercer] = {
+    int: _to_int,
+    float: _to_number,
+    bool: _to_bool,
+    str: _to_str,
+}
+
+
+_SCALARS: Dict[Any, Tuple[Dict[str, Any], Check]] = {
+    str: ({"type": "string"}, _is_str),
+    bool: ({"type": "boolean"}, _is_bool),
+    int: ({"type": "integer"}, _is_int),
+    float: ({"type": "number"}, _is_number),
+}
+
+
+def compile_annotation(annotation: Any) -> Tuple[Dict[str, Any], Check, bool]:
+    """
+    Type hint → (JSON schema, validator, nullable).
+    Desteklenen: str/int/float/bool, dict/Dict, list/List[X], Optional/Union, Any.
+    """
+    if annotation is Any or annotation is inspect.Parameter.empty:
+        return {}, _any, True
+
+    origin = get_origin(annotation)
+    if origin is Union:
+        members = [arg for arg in get_args(annotation) if arg is not type(None)]
+        nullable = len(members) < len(get_args(annotation))
+        compiled = [compile_annotation(member) for member in members]
+        if len(compiled) == 1:
+            schema, check, _ = compiled[0]
+        else:
+            schema = {"oneOf": [member_schema for member_schema, _, _ in compiled]}
+            checks = tuple(member_check for _, member_check, _ in compiled)
+
+            def check(value: Any) -> bool:
+                return any(member_check(value) for member_check in checks)
+        return schema, check, nullable
+
+    if annotation is list or origin is list:
+        args = get_args(annotation)
+        if not args:
+            return {"type": "array"}, lambda value: isinstance(value, list), False
+        item_schema, item_check, item_nullable = compile_annotation(args[0])
+
+        def check_list(value: Any) -> bool:
+            return isinstance(value, list) and all(
+                (item is None and item_nullable) or item_check(item) for item in value
+            )
+        return {"type": "array", "items": item_schema}, check_list, False
+
+    if annotation is dict or origin is dict:
+        return {"type": "object"}, _is_dict, False
+
+    if annotation in _SCALARS:
+        schema, check = _SCALARS[annotation]
+        return dict(schema), check, False
+
+    raise TypeError(f"Unsupported tool parameter annotation: {annotation!r}")
+
+
+def compile_coercer(annotation: Any) -> Optional[Coercer]:
+    """
+    Type hint → tipi uymayan değeri dönüştüren fonksiyon (ValueError: dönüşmez).
+    Sadece skaler tipler (ve Optional'ları) için; diğerlerinde None.
+    """
+    if get_origin(annotation) is Union:
+        members = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return compile_coercer(members[0]) if len(members) == 1 else None
+    return _COERCERS.get(annotation)
+
+
+def parse_arg_descriptions(fn: Callable[..., Any]) -> Dict[str, str]:
+    """
+    Google-style docstring'in Args: bölümünden {parametre: açıklama}.
+    Girintili devam satırları açıklamaya eklenir.
+    """
+    descriptions: Dict[str, str] = {}
+    current: Optional[str] = None
+    in_args = False
+    for line in (inspect.getdoc(fn) or "").splitlines():
+        if line.strip() == "Args:":
+            in_args = True
+            continue
+        if not in_args:
+            continue
+        if not line.strip():
+            current = None
+            continue
+        if not line.startswith(" "):
+            break  # Returns: vb. sonraki bölüm
+        entry = _ARGS_ENTRY.match(line)
+        if entry:
+            current = entry.group(1)
+            descriptions[current] = entry.group(2).strip()
+        elif current is not None:
+            descriptions[current] = f"{descriptions[current]} {line.strip()}".strip()
+    return descriptions
+
+
+def _json_type(value: Any) -> str:
+    return _JSON_TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _expected(schema: Dict[str, Any]) -> str:
+    if "enum" in schema:
+        return "one of " + ", ".join(repr(option) for option in schema["enum"])
+    if "oneOf" in schema:
+        return " or ".join(_expected(option) for option in schema["oneOf"])
+    if schema.get("type") == "array" and "type" in schema.get("items", {}):
+        return f"array of {schema['items']['type']}"
+    return schema.get("type", "any")
+
+
+class ToolParameter:
+    """Bir tool parametresinin derlenmiş schema + validator'ı"""
+
+    __slots__ = ("name", "schema", "check", "nullable", "required", "enum", "coercer", "custom")
+
+    def __init__(self, name: str, schema: Dict[str, Any], check: Check, nullable: bool, required: bool,
+                 coercer: Optional[Coercer] = None, custom: Optional[Coercer] = None):
+        self.name = name
+        self.schema = schema
+        self.check = check
+        self.nullable = nullable
+        self.required = required
+        self.enum = frozenset(schema["enum"]) if "enum" in schema else None
+        self.coercer = coercer
+        self.custom = custom
+
+    def accepts(self, value: Any) -> bool:
+        if value is None:
+            return self.nullable
+        return self.check(value) and (self.enum is None or value in self.enum)
+
+    def coerce(self, value: Any) -> Any:
+        """
+        Değeri parametre tipine getirir; getiremezse ValueError (mesaj kullanıcıya döner).
+        Özel coercer (custom) her zaman, tip coercer'ı sadece değer uymazsa çalışır.
+        """
+        if self.custom is not None:
+            try:
+                value = self.custom(value)
+            except ValueError as e:
+                raise ValueError(f"'{self.name}': {e}") from None
+        if self.accepts(value):
+            return value
+        if value == "" and self.nullable:
+            return None
+        if self.coercer is not None and value is not None:
+            try:
+                coerced = self.coercer(value)
+            except (TypeError, ValueError):
+                pass
+            else:
+                if self.accepts(coerced):
+                    return coerced
+        if value is None:
+            raise ValueError(f"'{self.name}' must not be null")
+        raise ValueError(f"'{self.name}' must be {_expected(self.schema)}, got {_json_type(value)} {value!r:.40}")
+
+
+class Tool:
+    """Kayıtlı bir MCP tool'u: fonksiyon + inputSchema + validator'lar"""
+
+    def __init__(self, fn: Callable[..., Any], name: str, description: str,
+                 schema: Optional[Dict[str, Dict[str, Any]]] = None,
+                 coerce: Optional[Dict[str, Coercer]] = None):
+        self.fn = fn
+        self.name = name
+        self.description = description
+        self.is_async = inspect.iscoroutinefunction(fn)
+        self.parameters: Dict[str, ToolParameter] = {}
+
+        hints = get_type_hints(fn)
+        descriptions = parse_arg_descriptions(fn)
+        overrides = schema or {}
+        coercers = coerce or {}
+        properties: Dict[str, Dict[str, Any]] = {}
+        required: List[str] = []
+
+        for param in inspect.signature(fn).parameters.values():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            annotation = hints.get(param.name, param.annotation)
+            param_schema, check, nullable = compile_annotation(annotation)
+            if param.name in descriptions:
+                param_schema["description"] = descriptions[param.name]
+            if param.default is not param.empty and param.default is not None:
+                param_schema["default"] = param.default
+            param_schema.update(overrides.get(param.name, {}))
+
+            is_required = param.default is param.empty
+            if is_required:
+                required.append(param.name)
+            properties[param.name] = param_schema
+            self.parameters[param.name] = ToolParameter(
+                param.name, param_schema, check, nullable, is_required,
+                coercer=compile_coercer(annotation), custom=coercers.get(param.name),
+            )
+
+        unknown = (set(overrides) | set(coercers)) - set(properties)
+        if unknown:
+            raise TypeError(f"{name}: schema/coerce entries for unknown parameters: {', '.join(sorted(unknown))}")
+
+        self.input_schema: Dict[str, Any] = {"type": "object", "properties": properties}
+        if required:
+            self.input_schema["required"] = required
+        self._required = tuple(required)
+        # Özel coercer'ı olan parametreler fast path'e giremez
+        self._custom = frozenset(coercers)
+
+    def to_mcp(self) -> Dict[str, Any]:
+        """tools/list girdisi"""
+        return {"name": self.name, "description": self.description, "inputSchema": self.input_schema}
+
+    def validate(self, arguments: Any) -> Dict[str, Any]:
+        """
+        Argümanları signature'a göre temizler ve yeni bir dict döndürür:
+        bilinmeyen key'ler atılır, değerler gerekirse dönüştürülür. Dönüşmeyen
+        değer veya eksik zorunlu argüman → ToolArgumentError (tüm sorunlar
+        tek mesajda, agent tek denemede düzeltebilsin).
+        """
+        if arguments is None:
+            arguments = {}
+        elif not isinstance(arguments, dict):
+            raise ToolArgumentError(f"Invalid arguments for {self.name}: expected an object, got {_json_type(arguments)}")
+
+        parameters = self.parameters
+        custom = self._custom
+        cleaned: Dict[str, Any] = {}
+        problems: Optional[List[str]] = None
+        unknown: Optional[List[str]] = None
+
+        for key, value in arguments.items():
+            parameter = parameters.get(key)
+            if parameter is None:
+                if unknown is None:
+                    unknown = []
+                unknown.append(key)
+                continue
+            # Fast path: tipi zaten doğru (çoğu çağrı)
+            if key not in custom and parameter.accepts(value):
+                cleaned[key] = value
+                continue
+            try:
+                cleaned[key] = parameter.coerce(value)
+            except ValueError as e:
+                if problems is None:
+                    problems = []
+                problems.append(str(e))
+
+        for name in self._required:
+            if name not in cleaned and name not in arguments:
+                if problems is None:
+                    problems = []
+                problems.append(f"missing required argument '{name}'")
+
+        if problems:
+            raise ToolArgumentError(f"Invalid arguments for {self.name}: {'; '.join(problems)}")
+        if unknown:
+            print(f"⚠️ {self.name}: ignoring unknown argument(s) {', '.join(unknown)}")
+        return cleaned
+
+    async def call(self, arguments: Dict[str, Any]) -> Any:
+        result = self.fn(**arguments)
+        if self.is_async:
+            result = await result
+        return result
+
+
+class ToolRegistry:
+    """name → Tool; tools/list listesi ve dispatch tablosu"""
+
+    def __init__(self):
+        self._tools: Dict[str, Tool] = {}
+        self._listeners: List[Callable[[], None]] = []
+        self._schemas: Optional[List[Dict[str, Any]]] = None
+
+    def tool(self, name: str, description: str,
+             schema: Optional[Dict[str, Dict[str, Any]]] = None,
+             coerce: Optional[Dict[str, Coercer]] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Decorator: fonksiyonu MCP tool'u olarak kaydeder, fonksiyonu değiştirmez.
+        schema: parametre bazında schema eklemeleri (ör. {"sort": {"enum": [...]}})
+        coerce: parametre bazında özel dönüştürücüler (ör. {"price": coerce_price})
+        """
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self.register(Tool(fn, name, description, schema, coerce))
+            return fn
+        return decorator
+
+    def register(self, tool: Tool) -> None:
+        self._tools[tool.name] = tool
+        self._changed()
+
+    def unregister(self, name: str) -> None:
+        if self._tools.pop(name, None) is not None:
+            self._changed()
+
+    def subscribe(self, listener: Callable[[], None]) -> None:
+        """Tool eklenince/çıkınca çağrılır (ör. pre-serialized tools/list'i yenilemek için)"""
+        self._listeners.append(listener)
+
+    def _changed(self) -> None:
+        self._schemas = None
+        for listener in self._listeners:
+            listener()
+
+    def get(self, name: Optional[str]) -> Optional[Tool]:
+        return self._tools.get(name)  # type: ignore[arg-type]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def names(self) -> Iterable[str]:
+        return self._tools.keys()
+
+    def schemas(self) -> List[Dict[str, Any]]:
+        """tools/list 'tools' listesi (değişene kadar cache'li)"""
+        if self._schemas is None:
+            self._schemas = [tool.to_mcp() for tool in self._tools.values()]
+        return self._schemas
+
+
+def parameters_schema(fn: Callable[..., Any], include: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Bir fonksiyonun (kayıtlı olmasa da) object schema'sı; ör. bulk insert'te
+    ilan elemanlarının şeması insert_listing'ten türetilir.
+    """
+    schema = Tool(fn, fn.__name__, "").input_schema
+    if include is None:
+        return schema
+    fields = list(include)
+    result: Dict[str, Any] = {
+        "type": "object",
+        "properties": {name: schema["properties"][name] for name in fields},
+    }
+    required = [name for name in schema.get("required", []) if name in fields]
+    if required:
+        result["required"] = required
+    return result
+
+
+tool_registry = ToolRegistry()
+tool = tool_registry.tool
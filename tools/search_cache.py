@@ -0,0 +1,253 @@
+"""
+Read-through cache for search_listings results
+
+- Key: normalize edilmiş argüman seti (query, category, condition, location,
+  fiyat aralığı, metadata filtreleri, limit)
+- TTL + LRU (in-process) veya Redis-uyumlu backend (multi-replica deploy)
+- insert/update/delete sonrası eşleşen category/location girdileri silinir
+
+Env:
+    SEARCH_CACHE_BACKEND: "memory" (default), "redis" veya "off"
+    SEARCH_CACHE_TTL: saniye (default: 30)
+    SEARCH_CACHE_MAX_ENTRIES: LRU kapasitesi (default: 1024)
+    REDIS_URL: redis backend için bağlantı adresi
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson yoksa stdlib json
+    orjson = None
+
+CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory").lower()
+CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = "pazarglobal:search:"
+
+
+def make_key(args: Dict[str, Any], fold: Iterable[str] = ()) -> str:
+    """
+    Argümanları normalize edip deterministik cache key üretir.
+    None değerler atılır, string'ler trim edilir; sadece fold'daki
+    argümanlar (ilike / FTS ile aranan, büyük/küçük harf duyarsız alanlar)
+    lowercase yapılır. eq.* filtreleri ve cursor olduğu gibi kalır.
+    """
+    normalized = {}
+    for name, value in args.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if name in fold:
+                value = value.lower()
+        normalized[name] = value
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _affects(entry_tags: Tuple[Optional[str], Optional[str]],
+             category: Optional[str], location: Optional[str]) -> bool:
+    """
+    Yazılan ilan (category, location) bu cache girdisinin sonucunu değiştirebilir mi?
+    search_listings ilike.*x* kullandığı için substring eşleşmesi kontrol edilir.
+    Bilinmeyen değer (None) her zaman etkiler kabul edilir.
+    """
+    entry_category, entry_location = entry_tags
+    if entry_category and category is not None:
+        if entry_category not in category.lower():
+            return False
+    if entry_location and location is not None:
+        if entry_location not in location.lower():
+            return False
+    return True
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class MemoryBackend:
+    """
+    In-process TTL + LRU cache (OrderedDict).
+    Değerler serialize edilmiş (bytes) tutulur: her get yeni bir nesne döner,
+    çağıranın sonucu değiştirmesi cache'teki girdiyi bozmaz.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, tags, serialized value)
+        self._data: "OrderedDict[str, Tuple[float, Tuple[Optional[str], Optional[str]], bytes]]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, _, raw = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return _loads(raw)
+
+    async def set(self, key: str, value: Any, tags: Tuple[Optional[str], Optional[str]]) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, tags, _dumps(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def invalidate(self, category: Optional[str], location: Optional[str]) -> int:
+        stale = [k for k, (_, tags, _) in self._data.items() if _affects(tags, category, location)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """
+    Redis-uyumlu backend (redis, KeyDB, Dragonfly...).
+    TTL Redis tarafından uygulanır, LRU için sunucuda maxmemory-policy=allkeys-lru önerilir.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise ImportError("redis paketi yüklü değil. 'pip install redis' çalıştırın.")
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self.ttl = ttl
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(REDIS_PREFIX + key)
+        if raw is None:
+            return None
+        return json.loads(raw)["value"]
+
+    async def set(self, key: str, value: Any, tags: Tuple[Optional[str], Optional[str]]) -> None:
+        raw = json.dumps({"tags": list(tags), "value": value}, ensure_ascii=False, default=str)
+        await self._redis.set(REDIS_PREFIX + key, raw, px=int(self.ttl * 1000))
+
+    async def invalidate(self, category: Optional[str], location: Optional[str]) -> int:
+        removed = 0
+        async for redis_key in self._redis.scan_iter(match=REDIS_PREFIX + "*", count=500):
+            raw = await self._redis.get(redis_key)
+            if raw is None:
+                continue
+            tags = tuple(json.loads(raw)["tags"])
+            if _affects(tags, category, location):  # type: ignore[arg-type]
+                removed += await self._redis.delete(redis_key)
+        return removed
+
+    async def clear(self) -> None:
+        async for redis_key in self._redis.scan_iter(match=REDIS_PREFIX + "*", count=500):
+            await self._redis.delete(redis_key)
+
+    def size(self) -> int:
+        return -1  # Redis tarafında tutulur
+
+
+class SearchCache:
+    """Backend'den bağımsız read-through cache + sayaçlar"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            print(f"⚠️ Search cache get error: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, category: Optional[str], location: Optional[str]) -> None:
+        tags = (
+            category.strip().lower() if category else None,
+            location.strip().lower() if location else None,
+        )
+        try:
+            await self.backend.set(key, value, tags)
+        except Exception as e:
+            print(f"⚠️ Search cache set error: {e}")
+
+    async def invalidate(self, category: Optional[str] = None, location: Optional[str] = None) -> int:
+        """
+        category/location None ise "bilinmiyor" demektir ve o boyutta her girdi etkilenir.
+        """
+        try:
+            removed = await self.backend.invalidate(category, location)
+        except Exception as e:
+            print(f"⚠️ Search cache invalidate error: {e}")
+            return 0
+        self.invalidations += removed
+        return removed
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _build_cache() -> Optional[SearchCache]:
+    if CACHE_BACKEND == "off":
+        return None
+    if CACHE_BACKEND == "redis":
+        return SearchCache(RedisBackend(REDIS_URL, CACHE_TTL))
+    return SearchCache(MemoryBackend(CACHE_TTL, CACHE_MAX_ENTRIES))
+
+
+search_cache: Optional[SearchCache] = _build_cache()
+
+
+async def invalidate_for_listing(listing: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Yazma işlemi sonrası çağrılır. listing verilmezse tüm cache etkilenir.
+    """
+    if search_cache is None:
+        return
+    if not listing:
+        await search_cache.invalidate(None, None)
+        return
+    await search_cache.invalidate(listing.get("category"), listing.get("location"))
@@ -1,74 +1,141 @@
 # tools/search_listings.py
 
+import inspect
 import os
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
 import httpx
 
+from .clean_price import coerce_price
+from .json_stream import JSONArrayParser
+from .pagination import apply_cursor, next_cursor
+from .projection import build_select
+from .registry import tool
+from .search_cache import make_key, search_cache
+from .supabase_client import READ_TIMEOUT, get_client
+
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
+# Full-text search: listings.search_vector (title A, category B, description C, location D)
+# GIN index'i üzerinden websearch_to_tsquery('turkish', ...) - bkz. database/search_schema.sql
+FTS_CONFIG = "turkish"
+# Bu uzunluğun altındaki sorgular (ör. "ev") ilike ile aranır
+FTS_MIN_QUERY_LENGTH = int(os.getenv("SEARCH_FTS_MIN_QUERY_LENGTH", "3"))
+# search_schema.sql uygulanmamışsa (search_vector kolonu yok) auto mod ilk 400'den
+# sonra process ömrü boyunca ilike'a düşer; migration sonrası restart gerekir
+_fts_available = True
 
-async def search_listings(
-    query: Optional[str] = None,
-    category: Optional[str] = None,
-    condition: Optional[str] = None,
-    location: Optional[str] = None,
-    min_price: Optional[int] = None,
-    max_price: Optional[int] = None,
-    limit: int = 10,
-    metadata_type: Optional[str] = None,
-    room_count: Optional[str] = None,  # NEW: Direct metadata filter (e.g., "3+1")
-    property_type: Optional[str] = None,  # NEW: Direct metadata filter (e.g., "dubleks")
-) -> Dict[str, Any]:
+SEARCH_MODES = ("auto", "fts", "ilike")
+SORT_OPTIONS = ("recent", "relevance")
+
+VEHICLE_TERMS = ["araba", "otomobil", "araç", "oto"]
+PROPERTY_TERMS = ["ev", "daire", "emlak", "kiralık", "satılık"]
+
+
+def _use_fts(query: str, search_mode: str) -> bool:
+    if search_mode == "ilike":
+        return False
+    if search_mode == "fts":
+        return True
+    return _fts_available and len(query.strip()) >= FTS_MIN_QUERY_LENGTH
+
+
+def _fts_missing(search_mode: str, params: Dict[str, Any], status: int, body: str) -> bool:
     """
-    Supabase'den ilan arama.
-    WhatsApp'tan: "iPhone aramak istiyorum" → query="iPhone"
-    
-    Args:
-        query: Arama metni (title, description, category, location içinde ara)
-        category: Kategori filtresi
-        condition: Durum filtresi ("new", "used")
-        location: Lokasyon filtresi
-        min_price: Minimum fiyat
-        max_price: Maximum fiyat
-        limit: Sonuç sayısı (default: 10)
-        metadata_type: Metadata type filter ("vehicle", "part", "property")
-        room_count: Room count filter (e.g., "3+1") - searches in metadata->>'room_count'
-        property_type: Property type filter (e.g., "dubleks") - searches in metadata->>'property_type'
-        
-    Returns:
-        İlan listesi veya hata mesajı
+    Auto moddaki FTS isteği search_vector kolonu olmadığı için 400 aldıysa
+    FTS'i kapatır ve True döner (çağıran aynı aramayı ilike ile tekrarlar).
+    Açıkça search_mode="fts" istendiyse hata olduğu gibi döner.
     """
+    global _fts_available
+    if search_mode != "auto" or "search_vector" not in params:
+        return False
+    if status != 400 or "search_vector" not in body:
+        return False
+    _fts_available = False
+    print("⚠️ listings.search_vector bulunamadı (database/search_schema.sql uygulanmamış) - auto arama ilike'a düştü")
+    return True
 
-    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-        return {
-            "success": False,
-            "error": "SUPABASE_URL veya SUPABASE_SERVICE_KEY tanımlı değil",
-        }
+
+# ilike / FTS / trigram ile aranan argümanlar: büyük/küçük harf sonucu değiştirmez.
+# condition, metadata_type, room_count (eq.*) ve cursor (base64) case-sensitive.
+CASE_INSENSITIVE_ARGS = frozenset(("query", "category", "location", "property_type"))
+
+
+def _cache_key(args: Dict[str, Any]) -> str:
+    # Read-through cache: aynı normalize argümanlar → aynı sonuç
+    return make_key({**args, "fuzzy": bool(args.get("fuzzy"))}, fold=CASE_INSENSITIVE_ARGS)
+
+
+def _prepare_search(
+    query: Optional[str],
+    category: Optional[str],
+    condition: Optional[str],
+    location: Optional[str],
+    min_price: Optional[int],
+    max_price: Optional[int],
+    limit: int,
+    metadata_type: Optional[str],
+    room_count: Optional[str],
+    property_type: Optional[str],
+    cursor: Optional[str],
+    fields: Optional[Union[str, List[str]]],
+    search_mode: str,
+    sort: str,
+    fuzzy: bool,
+) -> Tuple[str, Dict[str, str], bool]:
+    """
+    Arama argümanlarından PostgREST isteğini kurar: (url, params, ranked).
+    Geçersiz argümanlarda ValueError (mesaj doğrudan kullanıcıya döner).
+    """
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(f"Invalid search_mode: {search_mode} (use one of {', '.join(SEARCH_MODES)})")
+    if sort not in SORT_OPTIONS:
+        raise ValueError(f"Invalid sort: {sort} (use one of {', '.join(SORT_OPTIONS)})")
 
     url = f"{SUPABASE_URL}/rest/v1/listings"
     
     # Supabase query parametreleri
+    select = build_select(fields)
+
     params: Dict[str, str] = {
+        "select": select,
         "limit": str(limit), 
-        "order": "created_at.desc",
         "status": "eq.active"  # Default: Only show active listings
     }
-    
+
     # Filtreler - Supabase PostgREST syntax
-    if query:
+    fts_query: Optional[str] = None
+    if query and fuzzy:
+        # FUZZY: metin filtresi RPC içinde (pg_trgm word_similarity), aşağıda yönlendirilir
+        pass
+    elif query and _use_fts(query, search_mode):
+        # FULL-TEXT SEARCH: tek GIN index taraması (title, category, description, location)
+        # Synonym expansion websearch "or" sözdizimi ile yapılır
+        query_lower = query.lower()
+        if query_lower in VEHICLE_TERMS:
+            if not category:
+                fts_query = f"{query} or otomotiv"
+        elif query_lower in PROPERTY_TERMS:
+            if not category:
+                fts_query = f"{query} or emlak"
+        else:
+            fts_query = query
+        if fts_query and sort == "recent":
+            params["search_vector"] = f"wfts({FTS_CONFIG}).{fts_query}"
+    elif query:
         # Synonym expansion for generic terms
         query_lower = query.lower()
         
         # SMART SEARCH: Search in multiple fields (title, description, category, location)
         # This makes search more flexible - no need to specify exact category!
-        if query_lower in ["araba", "otomobil", "araç", "oto"]:
+        # (ilike fallback: kısa sorgular veya search_mode="ilike")
+        if query_lower in VEHICLE_TERMS:
             # Generic vehicle search: Check category and metadata
             if not category:
                 params["or"] = f"(title.ilike.*{query}*,description.ilike.*{query}*,category.ilike.*otom*)"
-        elif query_lower in ["ev", "daire", "emlak", "kiralık", "satılık"]:
+        elif query_lower in PROPERTY_TERMS:
             # Real estate search: Check multiple fields
             if not category:
                 params["or"] = f"(title.ilike.*{query}*,description.ilike.*{query}*,category.ilike.*emlak*,location.ilike.*{query}*)"
@@ -111,12 +178,119 @@ async def search_listings(
     if property_type:
         # Search in BOTH metadata AND title/description (some listings have type in title, not metadata)
         # Example: "Dubleks" in title but property_type="daire" in metadata
-        if query:
-            # If query exists, combine with OR
-            params["or"] = f"(title.ilike.*{property_type}*,description.ilike.*{property_type}*,metadata->>property_type.ilike.*{property_type}*)" + "," + params.get("or", "")
+        property_filter = f"(title.ilike.*{property_type}*,description.ilike.*{property_type}*,metadata->>property_type.ilike.*{property_type}*)"
+        query_filter = params.pop("or", None)
+        if query_filter:
+            # ilike query grubu da varsa ikisi AND ile: or=(...),(...) geçersiz PostgREST sözdizimi
+            # (FTS/fuzzy yolunda query search_vector / RPC ile filtrelenir, or grubu yoktur)
+            params["and"] = f"(or{query_filter},or{property_filter})"
         else:
-            # No query, just search property_type in title, description, and metadata
-            params["or"] = f"(title.ilike.*{property_type}*,description.ilike.*{property_type}*,metadata->>property_type.ilike.*{property_type}*)"
+            params["or"] = property_filter
+
+    # Relevance / fuzzy: RPC kendi sırasıyla (rank / similarity) döner,
+    # diğer filtreler PostgREST tarafından üstüne uygulanır
+    rpc: Optional[str] = None
+    if query and fuzzy:
+        rpc, params["p_query"] = "search_listings_fuzzy", query
+    elif sort == "relevance" and fts_query is not None:
+        rpc, params["p_query"] = "search_listings_ranked", fts_query
+
+    ranked = rpc is not None
+    if ranked:
+        if cursor:
+            raise ValueError("cursor is only supported with sort='recent' and fuzzy=False")
+        url = f"{SUPABASE_URL}/rest/v1/rpc/{rpc}"
+    else:
+        # Keyset pagination: order=created_at.desc,id.desc + cursor filtresi
+        apply_cursor(params, cursor)  # InvalidCursor (ValueError)
+
+    return url, params, ranked
+
+
+@tool("search_listings_tool", "Supabase'den ilan arar", schema={
+    "search_mode": {"enum": list(SEARCH_MODES)},
+    "sort": {"enum": list(SORT_OPTIONS)},
+}, coerce={"min_price": coerce_price, "max_price": coerce_price})
+async def search_listings(
+    query: Optional[str] = None,
+    category: Optional[str] = None,
+    condition: Optional[str] = None,
+    location: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    limit: int = 10,
+    metadata_type: Optional[str] = None,
+    room_count: Optional[str] = None,  # NEW: Direct metadata filter (e.g., "3+1")
+    property_type: Optional[str] = None,  # NEW: Direct metadata filter (e.g., "dubleks")
+    cursor: Optional[str] = None,  # Keyset pagination: önceki sayfanın next_cursor değeri
+    fields: Optional[Union[str, List[str]]] = None,  # "summary" (default), "detail" veya kolon listesi
+    search_mode: str = "auto",  # "auto" (fts, kısa sorgularda ilike), "fts", "ilike"
+    sort: str = "recent",  # "recent" (created_at) veya "relevance" (ts_rank_cd, sadece fts)
+    fuzzy: bool = False,  # Yazım hatası toleranslı arama (pg_trgm benzerliği): "otomativ", "dublex"
+) -> Dict[str, Any]:
+    """
+    Supabase'den ilan arama.
+    WhatsApp'tan: "iPhone aramak istiyorum" → query="iPhone"
+    
+    Args:
+        query: Arama metni (title, description, category, location içinde ara)
+        category: Kategori filtresi
+        condition: Durum filtresi ("new", "used")
+        location: Lokasyon filtresi
+        min_price: Minimum fiyat
+        max_price: Maximum fiyat
+        limit: Sonuç sayısı (default: 10)
+        metadata_type: Metadata type filter ("vehicle", "part", "property")
+        room_count: Room count filter (e.g., "3+1") - searches in metadata->>'room_count'
+        property_type: Property type filter (e.g., "dubleks") - searches in metadata->>'property_type'
+        cursor: Sonraki sayfa için önceki cevaptaki next_cursor (opsiyonel)
+        fields: Dönecek kolonlar - "summary" (default: başlık/fiyat/lokasyon), "detail" (tüm kolonlar)
+            veya açık liste (["title", "price"] / "title,price")
+        search_mode: "auto" (default: full-text, FTS_MIN_QUERY_LENGTH altı ilike), "fts" veya "ilike"
+        sort: "recent" (default, cursor destekli) veya "relevance" (full-text rank, cursor yok)
+        fuzzy: True ise query trigram benzerliği ile aranır ve benzerliğe göre sıralanır
+            (search_mode/sort yok sayılır, cursor yok)
+        
+    Returns:
+        İlan listesi veya hata mesajı. Sayfa doluysa next_cursor ile devam edilir.
+    """
+
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        return {
+            "success": False,
+            "error": "SUPABASE_URL veya SUPABASE_SERVICE_KEY tanımlı değil",
+        }
+
+    args = {
+        "query": query,
+        "category": category,
+        "condition": condition,
+        "location": location,
+        "min_price": min_price,
+        "max_price": max_price,
+        "limit": limit,
+        "metadata_type": metadata_type,
+        "room_count": room_count,
+        "property_type": property_type,
+        "cursor": cursor,
+        "fields": fields,
+        "search_mode": search_mode,
+        "sort": sort,
+        "fuzzy": fuzzy,
+    }
+    cache_key = _cache_key(args)
+    if search_cache is not None:
+        cached = await search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        url, params, ranked = _prepare_search(**args)
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e),
+        }
 
     headers = {
         "apikey": SUPABASE_SERVICE_KEY,
@@ -124,16 +298,23 @@ async def search_listings(
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            resp = await client.get(url, params=params, headers=headers)
+        client = get_client()
+        resp = await client.get(url, params=params, headers=headers, timeout=READ_TIMEOUT)
+        if _fts_missing(search_mode, params, resp.status_code, resp.text):
+            url, params, ranked = _prepare_search(**args)
+            resp = await client.get(url, params=params, headers=headers, timeout=READ_TIMEOUT)
 
         if resp.is_success:
             data = resp.json()
-            return {
+            result = {
                 "success": True,
                 "count": len(data),
                 "results": data,
+                "next_cursor": None if ranked else next_cursor(data, limit),
             }
+            if search_cache is not None:
+                await search_cache.set(cache_key, result, category, location)
+            return result
         else:
             return {
                 "success": False,
@@ -151,3 +332,111 @@ async def search_listings(
             "success": False,
             "error": f"Beklenmeyen hata: {str(e)}",
         }
+
+
+_SEARCH_DEFAULTS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(search_listings).parameters.items()
+}
+
+
+def _stream_summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {key: value for key, value in result.items() if key != "results"}
+    summary["streamed"] = True
+    return summary
+
+
+async def search_listings_stream(**arguments: Any) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    search_listings'in streaming hali (aynı argümanlar).
+    PostgREST cevabı indikçe satırlar ("rows", [...]) olarak verilir; en sonda
+    ("result", özet) gelir. Özet search_listings sonucudur, "results" hariç
+    (satırlar zaten gönderildi). Hata durumunda ("result", hata) döner.
+    """
+    unknown = set(arguments) - set(_SEARCH_DEFAULTS)
+    if unknown:
+        raise TypeError(f"search_listings_stream() got unexpected keyword argument(s): {', '.join(sorted(unknown))}")
+
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        yield "result", {
+            "success": False,
+            "error": "SUPABASE_URL veya SUPABASE_SERVICE_KEY tanımlı değil",
+        }
+        return
+
+    args = {**_SEARCH_DEFAULTS, **arguments}
+    cache_key = _cache_key(args)
+    if search_cache is not None:
+        cached = await search_cache.get(cache_key)
+        if cached is not None:
+            if cached.get("results"):
+                yield "rows", cached["results"]
+            yield "result", _stream_summary(cached)
+            return
+
+    try:
+        url, params, ranked = _prepare_search(**args)
+    except ValueError as e:
+        yield "result", {
+            "success": False,
+            "error": str(e),
+        }
+        return
+
+    headers = {
+        "apikey": SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+    }
+
+    rows: List[Dict[str, Any]] = []
+    try:
+        client = get_client()
+        while True:
+            async with client.stream("GET", url, params=params, headers=headers, timeout=READ_TIMEOUT) as resp:
+                if resp.is_success:
+                    # İlk satırlar tüm cevap inmeden gönderilir
+                    parser = JSONArrayParser()
+                    async for chunk in resp.aiter_bytes():
+                        batch = parser.feed(chunk)
+                        if batch:
+                            rows.extend(batch)
+                            yield "rows", batch
+                    batch = parser.close()
+                    if batch:
+                        rows.extend(batch)
+                        yield "rows", batch
+                    break
+
+                body = (await resp.aread()).decode("utf-8", errors="replace")
+                if not _fts_missing(args["search_mode"], params, resp.status_code, body):
+                    yield "result", {
+                        "success": False,
+                        "status": resp.status_code,
+                        "error": body,
+                    }
+                    return
+            # search_vector yok: aynı arama ilike ile (satır gönderilmeden önce)
+            url, params, ranked = _prepare_search(**args)
+
+    except httpx.TimeoutException:
+        yield "result", {
+            "success": False,
+            "error": "Request timeout - Supabase bağlantısı zaman aşımına uğradı",
+        }
+        return
+    except Exception as e:
+        yield "result", {
+            "success": False,
+            "error": f"Beklenmeyen hata: {str(e)}",
+        }
+        return
+
+    result = {
+        "success": True,
+        "count": len(rows),
+        "results": rows,
+        "next_cursor": None if ranked else next_cursor(rows, args["limit"]),
+    }
+    if search_cache is not None:
+        await search_cache.set(cache_key, result, args["category"], args["location"])
+    yield "result", _stream_summary(result)
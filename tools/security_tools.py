@@ -1,17 +1,65 @@
 """
 Security tools for PIN authentication, session management, and rate limiting
 """
-from typing import Dict, Any, Optional
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 import bcrypt
 import secrets
-from datetime import datetime, timedelta
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 
-# Supabase client
+from .audit_sink import AUDIT_BUFFERED, audit_sink
+from .rate_limiter import RATE_LIMIT_MODE, LocalRateLimiter
+from .session_cache import session_cache
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+# Supabase client (async - never blocks the event loop)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")  # Service role key (bypasses RLS)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+_supabase: Optional["AsyncClient"] = None
+
+
+def get_supabase() -> "AsyncClient":
+    """
+    Supabase client'ı ilk kullanımda oluşturur ve cache'ler.
+    supabase SDK import'u (~0.7 s) ve client kurulumu cold start'tan çıkar;
+    env eksikse import değil ilk tool çağrısı hata döner.
+    """
+    global _supabase
+    if _supabase is None:
+        from supabase import AsyncClient
+        _supabase = AsyncClient(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return _supabase
+
+
+# phone -> (cached_until, user_id, has_pin): konuşmanın ilk adımı (get_user_by_phone).
+# Sadece PIN'i olan kullanıcılar cache'lenir: PIN kaydı başka bir worker'da
+# yapılsa bile "PIN tanımlı değil" cevabı bayat kalmaz.
+USER_LOOKUP_CACHE_TTL = float(os.getenv("USER_LOOKUP_CACHE_TTL", "300"))
+USER_LOOKUP_CACHE_MAX_ENTRIES = int(os.getenv("USER_LOOKUP_CACHE_MAX_ENTRIES", "4096"))
+_user_lookup_cache: "OrderedDict[str, Tuple[float, str, bool]]" = OrderedDict()
+
+# bcrypt is CPU-bound (~250 ms per hash) and releases the GIL:
+# run it on a small bounded pool instead of the event loop
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", "2"))
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+
+
+def _hash_pin(pin: str) -> str:
+    return bcrypt.hashpw(pin.encode(), bcrypt.gensalt()).decode()
+
+
+async def hash_pin(pin: str) -> str:
+    """Hash PIN with bcrypt off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_executor, _hash_pin, pin)
 
 
 async def verify_pin_tool(phone: str, pin: str) -> Dict[str, Any]:
@@ -32,13 +80,16 @@ async def verify_pin_tool(phone: str, pin: str) -> Dict[str, Any]:
     """
     try:
         # Call Supabase function
-        result = supabase.rpc("verify_pin", {
+        result = await get_supabase().rpc("verify_pin", {
             "p_phone": phone,
             "p_pin": pin
         }).execute()
         
         if result.data and len(result.data) > 0:
             row = result.data[0]
+            if row["success"]:
+                # Yeni token üretildi: telefonun cache'teki eski session'ları geçersiz
+                session_cache.invalidate_phone(phone)
             return {
                 "success": row["success"],
                 "session_token": row["session_token"],
@@ -62,6 +113,23 @@ async def verify_pin_tool(phone: str, pin: str) -> Dict[str, Any]:
         }
 
 
+async def _fetch_session_expiry(phone: str, session_token: str) -> Optional[str]:
+    """
+    Geçerli session'ın session_expires_at değeri (yoksa / dolmuşsa None)
+    """
+    result = await get_supabase().table("user_security") \
+        .select("session_expires_at") \
+        .eq("phone", phone) \
+        .eq("session_token", session_token) \
+        .gt("session_expires_at", datetime.now(timezone.utc).isoformat()) \
+        .limit(1) \
+        .execute()
+    
+    if result.data:
+        return result.data[0]["session_expires_at"]
+    return None
+
+
 async def check_session_tool(phone: str, session_token: str) -> Dict[str, Any]:
     """
     Check if session is still valid
@@ -78,26 +146,16 @@ async def check_session_tool(phone: str, session_token: str) -> Dict[str, Any]:
         }
     """
     try:
-        # Call Supabase function
-        result = supabase.rpc("is_session_valid", {
-            "p_phone": phone,
-            "p_session_token": session_token
-        }).execute()
+        # Cache hit → 0 round trip; miss → tek select (is_session_valid ile aynı koşul)
+        expires_at = await session_cache.load(
+            (phone, session_token),
+            lambda: _fetch_session_expiry(phone, session_token)
+        )
         
-        is_valid = result.data if isinstance(result.data, bool) else False
-        
-        if is_valid:
-            # Get expiry time
-            security_data = supabase.table("user_security") \
-                .select("session_expires_at") \
-                .eq("phone", phone) \
-                .eq("session_token", session_token) \
-                .single() \
-                .execute()
-            
+        if expires_at:
             return {
                 "valid": True,
-                "expires_at": security_data.data.get("session_expires_at") if security_data.data else None,
+                "expires_at": expires_at,
                 "message": "Session geçerli"
             }
         else:
@@ -115,6 +173,33 @@ async def check_session_tool(phone: str, session_token: str) -> Dict[str, Any]:
         }
 
 
+async def _rpc_check_rate_limit(
+    user_id: str,
+    phone: str,
+    action: str,
+    max_allowed: int
+) -> Optional[Dict[str, Any]]:
+    result = await get_supabase().rpc("check_rate_limit", {
+        "p_user_id": user_id,
+        "p_phone": phone,
+        "p_action": action,
+        "p_max_allowed": max_allowed
+    }).execute()
+    
+    return result.data[0] if result.data else None
+
+
+async def _rpc_apply_rate_limit_increments(increments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    result = await get_supabase().rpc("apply_rate_limit_increments", {
+        "p_increments": increments
+    }).execute()
+    
+    return result.data or []
+
+
+rate_limiter = LocalRateLimiter(_rpc_check_rate_limit, _rpc_apply_rate_limit_increments)
+
+
 async def check_rate_limit_tool(
     user_id: str,
     phone: str,
@@ -140,15 +225,13 @@ async def check_rate_limit_tool(
         }
     """
     try:
-        result = supabase.rpc("check_rate_limit", {
-            "p_user_id": user_id,
-            "p_phone": phone,
-            "p_action": action,
-            "p_max_allowed": max_allowed
-        }).execute()
+        if RATE_LIMIT_MODE == "local":
+            # Local karar: limit aşımı network I/O yapmaz, sayaçlar toplu sync edilir
+            row = await rate_limiter.check(user_id, phone, action, max_allowed)
+        else:
+            row = await _rpc_check_rate_limit(user_id, phone, action, max_allowed)
         
-        if result.data and len(result.data) > 0:
-            row = result.data[0]
+        if row:
             allowed = row["allowed"]
             current = row["current_count"]
             maximum = row["max_allowed"]
@@ -216,7 +299,28 @@ async def log_audit_tool(
         }
     """
     try:
-        result = supabase.rpc("log_audit", {
+        if AUDIT_BUFFERED:
+            # id/created_at burada üretilir; satır toplu insert ile arka planda yazılır
+            log_id = str(uuid.uuid4())
+            audit_sink.submit({
+                "id": log_id,
+                "user_id": user_id,
+                "phone": phone,
+                "action": action,
+                "resource_type": resource_type,
+                "resource_id": resource_id,
+                "response_status": response_status,
+                "error_message": error_message,
+                "request_data": request_data or {},
+                "created_at": datetime.now(timezone.utc).isoformat()
+            })
+            return {
+                "success": True,
+                "log_id": log_id,
+                "message": "Audit log kuyruğa alındı"
+            }
+        
+        result = await get_supabase().rpc("log_audit", {
             "p_user_id": user_id,
             "p_phone": phone,
             "p_action": action,
@@ -271,16 +375,18 @@ async def register_user_pin_tool(
             }
         
         # Hash PIN with bcrypt
-        pin_hash = bcrypt.hashpw(pin.encode(), bcrypt.gensalt()).decode()
+        pin_hash = await hash_pin(pin)
         
         # Insert into user_security
-        result = supabase.table("user_security").insert({
+        result = await get_supabase().table("user_security").insert({
             "user_id": user_id,
             "phone": phone,
             "pin_hash": pin_hash
         }).execute()
         
         if result.data:
+            # has_pin değişti
+            _user_lookup_cache.pop(phone, None)
             return {
                 "success": True,
                 "message": "PIN başarıyla kaydedildi. Lütfen PIN'inizi güvenli bir yerde saklayın."
@@ -314,31 +420,31 @@ async def get_user_by_phone_tool(phone: str) -> Dict[str, Any]:
         }
     """
     try:
-        # Check if user exists in users table
-        user_result = supabase.table("users") \
-            .select("id") \
-            .eq("phone", phone) \
-            .single() \
-            .execute()
-        
-        if not user_result.data:
-            return {
-                "success": False,
-                "user_id": None,
-                "has_pin": False,
-                "message": "Kullanıcı bulunamadı"
-            }
-        
-        user_id = user_result.data["id"]
-        
-        # Check if user has PIN in user_security
-        security_result = supabase.table("user_security") \
-            .select("id") \
-            .eq("phone", phone) \
-            .single() \
-            .execute()
-        
-        has_pin = bool(security_result.data)
+        cached = _user_lookup_cache.get(phone)
+        if cached and cached[0] > time.monotonic():
+            _user_lookup_cache.move_to_end(phone)
+            user_id, has_pin = cached[1], cached[2]
+        else:
+            # profiles + user_security tek RPC'de (security_schema.sql: get_user_by_phone)
+            result = await get_supabase().rpc("get_user_by_phone", {
+                "p_phone": phone
+            }).execute()
+            
+            if not result.data:
+                return {
+                    "success": False,
+                    "user_id": None,
+                    "has_pin": False,
+                    "message": "Kullanıcı bulunamadı"
+                }
+            
+            user_id = result.data[0]["user_id"]
+            has_pin = bool(result.data[0]["has_pin"])
+            if has_pin and USER_LOOKUP_CACHE_TTL > 0:
+                _user_lookup_cache[phone] = (time.monotonic() + USER_LOOKUP_CACHE_TTL, user_id, has_pin)
+                _user_lookup_cache.move_to_end(phone)
+                while len(_user_lookup_cache) > USER_LOOKUP_CACHE_MAX_ENTRIES:
+                    _user_lookup_cache.popitem(last=False)
         
         return {
             "success": True,
@@ -0,0 +1,149 @@
+"""
+Semantic (vector) search over product_embeddings
+"""
+import os
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from .clean_price import coerce_price
+from .embeddings import get_embedder, to_pgvector
+from .projection import build_select
+from .registry import tool
+from .supabase_client import READ_TIMEOUT, get_client
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+
+# ANN aday sayısı = limit * SEMANTIC_CANDIDATE_FACTOR (filtreler sonradan uygulandığı için)
+SEMANTIC_CANDIDATE_FACTOR = int(os.getenv("SEMANTIC_CANDIDATE_FACTOR", "5"))
+# match_listings() hnsw.ef_search = 200 ile çalışır; HNSW taraması bundan fazla aday döndürmez
+SEMANTIC_MAX_CANDIDATES = 200
+
+
+@tool("semantic_search_listings_tool", "Anlamsal ilan arama (anahtar kelime eşleşmesi gerektirmez)",
+      coerce={"min_price": coerce_price, "max_price": coerce_price})
+async def semantic_search_listings(
+    query: str,
+    category: Optional[str] = None,
+    condition: Optional[str] = None,
+    location: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    limit: int = 10,
+    fields: Optional[Union[str, List[str]]] = None,
+) -> dict:
+    """
+    Anlamsal ilan arama: sorgu embed edilir, product_embeddings üzerinde
+    en yakın komşular (HNSW index) bulunur ve aktif ilanlarla birleştirilir.
+    Anahtar kelime eşleşmesi gerekmez ("yazlık kıyafet" → "keten gömlek").
+
+    Args:
+        query: Doğal dil arama metni (zorunlu)
+        category: Kategori filtresi (partial match)
+        condition: Durum filtresi ("new", "used")
+        location: Lokasyon filtresi (partial match)
+        min_price: Minimum fiyat
+        max_price: Maximum fiyat
+        limit: Sonuç sayısı (default: 10, en fazla SEMANTIC_MAX_CANDIDATES=200 -
+            HNSW aday sınırı; filtreler adaylar üzerine uygulandığı için daha az dönebilir)
+        fields: Dönecek kolonlar - "summary" (default), "detail" veya kolon listesi
+
+    Returns:
+        dict with:
+            - success: bool
+            - count: number of listings found
+            - results: listings ordered by similarity (closest first)
+            - error: error message (if failed)
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        return {
+            "success": False,
+            "error": "SUPABASE_URL or SUPABASE_SERVICE_KEY not configured"
+        }
+
+    if not query or not query.strip():
+        return {
+            "success": False,
+            "error": "query is required"
+        }
+
+    try:
+        select = build_select(fields)
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+    try:
+        embedding = (await get_embedder().embed([query]))[0]
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Embedding error: {str(e)}"
+        }
+
+    # RPC en yakın adayları döner; filtreler PostgREST tarafından üstüne uygulanır
+    params: Dict[str, str] = {
+        "select": select,
+        "limit": str(limit),
+    }
+    if category:
+        params["category"] = f"ilike.*{category}*"
+    if condition:
+        params["condition"] = f"eq.{condition}"
+    if location:
+        params["location"] = f"ilike.*{location}*"
+    if min_price is not None and max_price is not None:
+        params["and"] = f"(price.gte.{min_price},price.lte.{max_price})"
+    elif min_price is not None:
+        params["price"] = f"gte.{min_price}"
+    elif max_price is not None:
+        params["price"] = f"lte.{max_price}"
+
+    match_count = max(int(limit) * SEMANTIC_CANDIDATE_FACTOR, int(limit))
+    payload = {
+        "p_query_embedding": to_pgvector(embedding),
+        "p_match_count": min(match_count, SEMANTIC_MAX_CANDIDATES),
+    }
+
+    headers = {
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "Content-Type": "application/json",
+    }
+
+    try:
+        client = get_client()
+        response = await client.post(
+            f"{SUPABASE_URL}/rest/v1/rpc/match_listings",
+            params=params,
+            json=payload,
+            headers=headers,
+            timeout=READ_TIMEOUT,
+        )
+
+        if response.is_success:
+            data = response.json()
+            return {
+                "success": True,
+                "count": len(data),
+                "results": data,
+            }
+        else:
+            return {
+                "success": False,
+                "status_code": response.status_code,
+                "error": f"Supabase error: {response.text}"
+            }
+
+    except httpx.TimeoutException:
+        return {
+            "success": False,
+            "error": "Request timeout"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Unexpected error: {str(e)}"
+        }
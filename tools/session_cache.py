@@ -0,0 +1,128 @@
+"""
+In-process cache for validated sessions (check_session_tool)
+
+- Key: (phone, session_token) → session_expires_at
+- Girdi en fazla SESSION_CACHE_TTL saniye tutulur, session_expires_at'ten
+  sonra asla geçerli sayılmaz
+- verify_pin başarılı olunca telefonun tüm girdileri silinir (yeni token)
+- Aynı key için eşzamanlı lookup'lar tek Supabase sorgusunda birleşir
+
+Not: cache process-local'dir. Birden fazla worker/replica varsa, başka bir
+process'te verify_pin ile geçersizleşen eski token en fazla TTL kadar
+kabul edilebilir; TTL bu yüzden kısa tutulur.
+
+Env:
+    SESSION_CACHE_TTL: saniye (default: 30, 0 → kapalı)
+    SESSION_CACHE_MAX_ENTRIES: LRU kapasitesi (default: 4096)
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "30"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "4096"))
+
+SessionKey = Tuple[str, str]
+
+
+def _seconds_until(expires_at: str) -> Optional[float]:
+    """
+    PostgREST timestamptz string'inin şu andan kaç saniye sonra dolduğu.
+    Parse edilemezse None (cache'lenmez).
+    """
+    try:
+        expiry = datetime.fromisoformat(expires_at)
+    except (TypeError, ValueError):
+        return None
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return (expiry - datetime.now(timezone.utc)).total_seconds()
+
+
+class SessionCache:
+    """TTL + LRU cache of valid sessions with single-flight loading"""
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL, max_entries: int = SESSION_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (cached_until (monotonic), session_expires_at)
+        self._data: "OrderedDict[SessionKey, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[SessionKey, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: SessionKey) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        cached_until, expires_at = item
+        if cached_until < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return expires_at
+
+    def set(self, key: SessionKey, expires_at: str) -> None:
+        if not self.enabled:
+            return
+        remaining = _seconds_until(expires_at)
+        if remaining is None or remaining <= 0:
+            return
+        self._data[key] = (time.monotonic() + min(self.ttl, remaining), expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate_phone(self, phone: str) -> None:
+        for key in [key for key in self._data if key[0] == phone]:
+            del self._data[key]
+
+    async def load(self, key: SessionKey, loader: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """
+        Cache'ten döner; yoksa loader'ı çalıştırır. Aynı key için devam eden
+        bir yükleme varsa onun sonucunu bekler (tek sorgu).
+        Geçersiz session (None) cache'lenmez.
+        """
+        expires_at = self.get(key)
+        if expires_at is not None:
+            self.hits += 1
+            return expires_at
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._loaded(key, done))
+        else:
+            self.coalesced += 1
+        # shield: bir çağıranın iptali diğerlerinin sorgusunu iptal etmez
+        return await asyncio.shield(task)
+
+    def _loaded(self, key: SessionKey, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if task.result():
+            self.set(key, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+session_cache = SessionCache()
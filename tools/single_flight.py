@@ -0,0 +1,64 @@
+"""
+Single-flight request coalescing for read tools
+
+Aynı anda aynı argümanlarla gelen okuma çağrıları (ör. bir kampanya sonrası
+yüzlerce "iPhone 13" araması) tek bir Supabase isteğinde birleşir: ilk çağrı
+isteği başlatır, devam ederken gelen diğerleri aynı sonucu bekler. Sonuç
+saklanmaz; istek bitince key serbest kalır (cache search_cache'in işi).
+
+    result = await single_flight.do(key, lambda: search_listings(**args))
+
+Env:
+    SINGLE_FLIGHT: "1" (default) veya "0" (her çağrı kendi isteğini yapar)
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT", "1") not in ("0", "false", "False")
+
+
+class SingleFlight:
+    """key → devam eden çağrının future'ı"""
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        fn'i çalıştırır; aynı key için devam eden bir çağrı varsa onun
+        sonucunu (veya exception'ını) döndürür.
+        """
+        if not self.enabled:
+            return await fn()
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self.coalesced += 1
+        # shield: bekleyenlerden birinin iptali paylaşılan isteği iptal etmez
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # kimse beklemiyorsa "never retrieved" uyarısı çıkmasın
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "inflight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,136 @@
+"""
+SSE session registry with a shared keepalive timer wheel
+
+Her /sse bağlantısı bir SSESession'dır: session id endpoint event'inde
+(/messages?session_id=...) verilir, cevaplar bu id ile doğru akışa yönlenir.
+
+- Registry session'ları weakref ile tutar: bağlantı (generator) biterse
+  session otomatik düşer, unutulan temizlik sızıntı yapmaz
+- Bağlantı başına timer yok: tek bir ticker task'ı keepalive'ları
+  KEEPALIVE_SECONDS / WHEEL_SLOTS aralıkla bir slot'a gönderir. Her session
+  bir slot'a atanır, yani her session her KEEPALIVE_SECONDS'ta bir ping
+  alır ve ping'ler zamana yayılır (10k bağlantı aynı anda uyanmaz)
+- Boşta bekleyen bir bağlantının maliyeti: kuyrukta bekleyen tek bir
+  await; ping'ler aynı zamanda kopmuş bağlantıyı tespit eder (send hatası)
+
+Env:
+    MCP_SSE_KEEPALIVE_SECONDS: keepalive aralığı (default: 30)
+    MCP_SSE_QUEUE_SIZE: session başına bekleyen mesaj sınırı (default: 256)
+"""
+import asyncio
+import os
+import secrets
+import weakref
+from typing import Any, Coroutine, Dict, Optional
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv("MCP_SSE_KEEPALIVE_SECONDS", "30"))
+SSE_QUEUE_SIZE = int(os.getenv("MCP_SSE_QUEUE_SIZE", "256"))
+WHEEL_SLOTS = 30
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def sse_message(data: bytes) -> bytes:
+    """JSON payload → SSE 'message' event"""
+    return b"event: message\ndata: " + data + b"\n\n"
+
+
+class SSESession:
+    """Bir /sse bağlantısı: giden mesaj kuyruğu + bu session'a akan tool çağrıları"""
+
+    __slots__ = ("id", "queue", "tasks", "__weakref__")
+
+    def __init__(self, queue_size: int = SSE_QUEUE_SIZE):
+        self.id = secrets.token_hex(16)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.tasks: Optional[set] = None  # ilk spawn'da oluşturulur (çoğu session hiç kullanmaz)
+
+    async def send(self, data: bytes) -> None:
+        """JSON mesajı akışa yazar (kuyruk doluysa bekler: yavaş client → backpressure)"""
+        await self.queue.put(sse_message(data))
+
+    def ping(self) -> None:
+        if self.queue.empty():
+            # Mesaj bekliyorsa ping gereksiz; bağlantı zaten yazılacak
+            self.queue.put_nowait(KEEPALIVE)
+
+    def spawn(self, coro: Coroutine[Any, Any, Any]) -> None:
+        if self.tasks is None:
+            self.tasks = set()
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def close(self) -> None:
+        for task in list(self.tasks or ()):
+            task.cancel()
+
+
+class SessionRegistry:
+    """session_id → SSESession (weak) + keepalive timer wheel"""
+
+    def __init__(self, keepalive_seconds: float = SSE_KEEPALIVE_SECONDS, slots: int = WHEEL_SLOTS):
+        self.keepalive_seconds = keepalive_seconds
+        self.slots = slots
+        self._sessions: "weakref.WeakValueDictionary[str, SSESession]" = weakref.WeakValueDictionary()
+        self._wheel = [weakref.WeakSet() for _ in range(slots)]
+        self._cursor = 0
+        self._ticker: Optional[asyncio.Task] = None
+        self.opened = 0
+        self.pings = 0
+
+    def open(self) -> SSESession:
+        session = SSESession()
+        self._sessions[session.id] = session
+        # Ticker'ın en son geçtiği slot: ilk ping ~keepalive_seconds sonra
+        self._wheel[(self._cursor - 1) % self.slots].add(session)
+        self.opened += 1
+        self._ensure_ticker()
+        return session
+
+    def close(self, session: SSESession) -> None:
+        self._sessions.pop(session.id, None)
+        for slot in self._wheel:
+            slot.discard(session)
+        session.close()
+
+    def get(self, session_id: Optional[str]) -> Optional[SSESession]:
+        if not session_id:
+            return None
+        return self._sessions.get(session_id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _ensure_ticker(self) -> None:
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._tick(), name="sse-keepalive")
+
+    async def _tick(self) -> None:
+        interval = self.keepalive_seconds / self.slots
+        while self._sessions:
+            await asyncio.sleep(interval)
+            for session in list(self._wheel[self._cursor]):
+                session.ping()
+                self.pings += 1
+            self._cursor = (self._cursor + 1) % self.slots
+
+    async def stop(self) -> None:
+        if self._ticker is not None and not self._ticker.done():
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+        self._ticker = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "opened": self.opened,
+            "pings": self.pings,
+            "keepalive_seconds": self.keepalive_seconds,
+        }
+
+
+sse_sessions = SessionRegistry()
@@ -5,7 +5,10 @@ Category Suggestion Tool - AI-powered category inference
 Use this tool to validate or suggest categories for listings
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .category_classifier import CATEGORY_MODEL_MIN_CONFIDENCE, get_classifier
+from .keyword_matcher import KeywordMatcher
 
 
 CATEGORY_KEYWORDS = {
@@ -22,6 +25,38 @@ CATEGORY_KEYWORDS = {
 }
 
 
+# Compiled Aho–Corasick automaton over CATEGORY_KEYWORDS (built once, see rebuild_matcher)
+_matcher: Optional[KeywordMatcher] = None
+_matcher_source: Optional[Dict[str, List[str]]] = None
+
+
+def rebuild_matcher() -> KeywordMatcher:
+    """
+    Keyword otomatını CATEGORY_KEYWORDS'ten yeniden derler.
+    Tablo yerinde değiştirildiyse (append vb.) çağrılmalıdır.
+    """
+    global _matcher, _matcher_source
+    _matcher = KeywordMatcher(CATEGORY_KEYWORDS)
+    _matcher_source = CATEGORY_KEYWORDS
+    return _matcher
+
+
+def set_category_keywords(table: Dict[str, List[str]]) -> None:
+    """
+    Keyword tablosunu değiştirir ve otomatı yeniden derler.
+    """
+    global CATEGORY_KEYWORDS
+    CATEGORY_KEYWORDS = table
+    rebuild_matcher()
+
+
+def _get_matcher() -> KeywordMatcher:
+    # Tablo yeniden atanmışsa (module.CATEGORY_KEYWORDS = ...) otomatik rebuild
+    if _matcher is None or _matcher_source is not CATEGORY_KEYWORDS:
+        return rebuild_matcher()
+    return _matcher
+
+
 async def suggest_category(
     title: str,
     description: Optional[str] = None,
@@ -29,6 +64,19 @@ async def suggest_category(
 ) -> Dict[str, Any]:
     """
     Suggest appropriate category based on title and description.
+    Async wrapper around suggest_category_sync (tool interface).
+    """
+    return suggest_category_sync(title, description, user_category)
+
+
+def suggest_category_sync(
+    title: str,
+    description: Optional[str] = None,
+    user_category: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Suggest appropriate category based on title and description.
+    Pure CPU, no I/O - bulk import'larda tek geçişte çağrılabilir.
     
     Args:
         title: Listing title
@@ -45,26 +93,30 @@ async def suggest_category(
         }
     """
     
-    text = (title + " " + (description or "")).lower()
+    text = title + " " + (description or "")
     
-    # Score each category based on keyword matches
-    scores = {}
-    matched_keywords = {}
+    # Score each category based on keyword matches (single pass over text)
+    matched_keywords = _get_matcher().match(text)
+    scores = {category: len(matches) for category, matches in matched_keywords.items()}
     
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        score = 0
-        matches = []
-        for keyword in keywords:
-            if keyword.lower() in text:
-                score += 1
-                matches.append(keyword)
-        
-        if score > 0:
-            scores[category] = score
-            matched_keywords[category] = matches
+    # Trained model (if present) takes precedence over keyword counts
+    best_category = None
+    confidence = 0.0
+    scorer = "keyword"
+    classifier = get_classifier()
+    if classifier is not None:
+        predicted, probability = classifier.predict(text)
+        if probability >= CATEGORY_MODEL_MIN_CONFIDENCE:
+            best_category, confidence, scorer = predicted, probability, "model"
+    
+    if best_category is None and scores:
+        # Find best match
+        best_category = max(scores, key=scores.get)
+        best_score = scores[best_category]
+        confidence = min(best_score / 3.0, 1.0)  # Cap at 1.0
     
     # No matches found
-    if not scores:
+    if best_category is None:
         return {
             "success": True,
             "suggested_category": None,
@@ -73,17 +125,12 @@ async def suggest_category(
             "message": "No clear category match found. Using generic category recommended."
         }
     
-    # Find best match
-    best_category = max(scores, key=scores.get)
-    best_score = scores[best_category]
-    total_keywords = len(CATEGORY_KEYWORDS[best_category])
-    confidence = min(best_score / 3.0, 1.0)  # Cap at 1.0
-    
     result = {
         "success": True,
         "suggested_category": best_category,
         "confidence": round(confidence, 2),
-        "matches": matched_keywords[best_category],
+        "matches": matched_keywords.get(best_category, []),
+        "scorer": scorer,
     }
     
     # Validate user's category if provided
@@ -96,3 +143,14 @@ async def suggest_category(
             result["warning"] = f"User selected '{user_category}' but AI suggests '{best_category}'"
     
     return result
+
+
+def suggest_categories(
+    items: Iterable[Tuple[str, Optional[str], Optional[str]]]
+) -> List[Dict[str, Any]]:
+    """
+    Batch API: (title, description, user_category) listesi için öneriler.
+    Import'larda binlerce başlığı tek çağrıda kategorize eder.
+    """
+    _get_matcher()
+    return [suggest_category_sync(title, description, user_category) for title, description, user_category in items]
@@ -0,0 +1,81 @@
+"""
+Shared Supabase (PostgREST) HTTP client
+
+Tüm tool'lar tek bir process-wide httpx.AsyncClient kullanır:
+keep-alive pooling + HTTP/2 multiplexing sayesinde her tools/call
+için TCP+TLS handshake tekrar ödenmez.
+
+Lifecycle server.py içindeki FastAPI lifespan tarafından yönetilir
+(start_client / close_client). Script'lerden doğrudan çağrıldığında
+get_client() client'ı lazy olarak oluşturur.
+"""
+import os
+from typing import Optional
+
+import httpx
+
+# Pool limits (env ile ayarlanabilir)
+POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("SUPABASE_HTTP2", "1") not in ("0", "false", "False")
+
+# Per-operation timeouts (saniye)
+READ_TIMEOUT = httpx.Timeout(float(os.getenv("SUPABASE_READ_TIMEOUT", "20")), connect=5.0)
+WRITE_TIMEOUT = httpx.Timeout(float(os.getenv("SUPABASE_WRITE_TIMEOUT", "30")), connect=5.0)
+LOOKUP_TIMEOUT = httpx.Timeout(float(os.getenv("SUPABASE_LOOKUP_TIMEOUT", "10")), connect=5.0)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED and _http2_available(),
+        limits=limits,
+        timeout=READ_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Paylaşılan AsyncClient'ı döndürür (yoksa oluşturur).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def start_client() -> httpx.AsyncClient:
+    """
+    Server startup'ta çağrılır - pool'u önceden oluşturur.
+    """
+    client = get_client()
+    print(f"🔌 Supabase client ready (http2={HTTP2_ENABLED and _http2_available()}, "
+          f"max_connections={POOL_MAX_CONNECTIONS})")
+    return client
+
+
+async def close_client() -> None:
+    """
+    Server shutdown'da çağrılır - açık bağlantıları kapatır.
+    """
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
@@ -4,11 +4,17 @@ Update an existing listing in Supabase
 import os
 import httpx
 from typing import Optional
+from .clean_price import coerce_price
 from .suggest_category import suggest_category
+from .embedding_worker import notify_listing_upsert
+from .registry import tool
+from .search_cache import invalidate_for_listing
+from .supabase_client import LOOKUP_TIMEOUT, WRITE_TIMEOUT, get_client
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
+@tool("update_listing_tool", "Mevcut ilanı günceller", coerce={"price": coerce_price})
 async def update_listing(
     listing_id: str,
     user_id: str = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11",  # For RLS validation (future)
@@ -91,18 +97,19 @@ async def update_listing(
         # If we're updating category but not title/description, we need to fetch current values
         if validation_title is None or validation_description is None:
             try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    fetch_resp = await client.get(
-                        f"{SUPABASE_URL}/rest/v1/listings?id=eq.{listing_id}&select=title,description",
-                        headers={
-                            "apikey": SUPABASE_KEY,
-                            "Authorization": f"Bearer {SUPABASE_KEY}"
-                        }
-                    )
-                    if fetch_resp.is_success and fetch_resp.json():
-                        current = fetch_resp.json()[0]
-                        validation_title = validation_title or current.get("title")
-                        validation_description = validation_description or current.get("description")
+                client = get_client()
+                fetch_resp = await client.get(
+                    f"{SUPABASE_URL}/rest/v1/listings?id=eq.{listing_id}&select=title,description",
+                    headers={
+                        "apikey": SUPABASE_KEY,
+                        "Authorization": f"Bearer {SUPABASE_KEY}"
+                    },
+                    timeout=LOOKUP_TIMEOUT,
+                )
+                if fetch_resp.is_success and fetch_resp.json():
+                    current = fetch_resp.json()[0]
+                    validation_title = validation_title or current.get("title")
+                    validation_description = validation_description or current.get("description")
             except Exception as e:
                 print(f"⚠️ Could not fetch current listing for validation: {e}")
         
@@ -137,27 +144,36 @@ async def update_listing(
     url = f"{SUPABASE_URL}/rest/v1/listings"
     
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            # Supabase update with filter: PATCH /listings?id=eq.{listing_id}
-            response = await client.patch(
-                f"{url}?id=eq.{listing_id}",
-                json=payload,
-                headers=headers
-            )
-            
-            if response.status_code in [200, 201, 204]:
-                result = response.json() if response.text else {"listing_id": listing_id}
-                return {
-                    "success": True,
-                    "status_code": response.status_code,
-                    "result": result if result else {"listing_id": listing_id, "updated": True}
-                }
+        client = get_client()
+        # Supabase update with filter: PATCH /listings?id=eq.{listing_id}
+        response = await client.patch(
+            f"{url}?id=eq.{listing_id}",
+            json=payload,
+            headers=headers,
+            timeout=WRITE_TIMEOUT,
+        )
+        
+        if response.status_code in [200, 201, 204]:
+            result = response.json() if response.text else {"listing_id": listing_id}
+            # category/location değiştiyse eski değer bilinmiyor → tüm cache
+            if "category" in payload or "location" in payload or not result:
+                await invalidate_for_listing(None)
             else:
-                return {
-                    "success": False,
-                    "status_code": response.status_code,
-                    "error": f"Supabase error: {response.text}"
-                }
+                await invalidate_for_listing(result[0] if isinstance(result, list) else result)
+            # Embed edilen metin değiştiyse vektör arka planda yenilenir
+            if isinstance(result, list) and result and payload.keys() & {"title", "description", "category", "location"}:
+                notify_listing_upsert(result[0])
+            return {
+                "success": True,
+                "status_code": response.status_code,
+                "result": result if result else {"listing_id": listing_id, "updated": True}
+            }
+        else:
+            return {
+                "success": False,
+                "status_code": response.status_code,
+                "error": f"Supabase error: {response.text}"
+            }
                 
     except httpx.ConnectError as e:
         return {
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from tools.category_classifier import CATEGORY_MODEL_PATH, NaiveBayesCategoryClassifier
+from tools.pagination import apply_cursor, next_cursor
+from tools.suggest_category import CATEGORY_KEYWORDS
+from tools.supabase_client import READ_TIMEOUT, close_client, get_client
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+
+DEFAULT_DATASET = os.path.join("models", "category_dataset.jsonl")
+
+
+def canonical_category(category):
+    """DB kategorisini CATEGORY_KEYWORDS anahtarına eşle ("Emlak – Kiralık Daire" → "Emlak")"""
+    if not category:
+        return None
+    value = category.lower()
+    for name in CATEGORY_KEYWORDS:
+        if name.lower() in value or value in name.lower():
+            return name
+    return None
+
+
+async def export_listings(path):
+    """Supabase'ten (title, description, category) export et → JSONL"""
+    
+    print(f"📥 Exporting listings from {SUPABASE_URL}")
+    headers = {
+        "apikey": SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+    }
+    client = get_client()
+    cursor = None
+    exported = 0
+    skipped = 0
+    
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        while True:
+            params = {"select": "id,title,description,category,created_at", "limit": 1000}
+            apply_cursor(params, cursor)
+            resp = await client.get(f"{SUPABASE_URL}/rest/v1/listings", params=params, headers=headers, timeout=READ_TIMEOUT)
+            resp.raise_for_status()
+            rows = resp.json()
+            for row in rows:
+                label = canonical_category(row.get("category"))
+                if not label or not row.get("title"):
+                    skipped += 1
+                    continue
+                text = row["title"] + " " + (row.get("description") or "")
+                f.write(json.dumps({"text": text, "label": label}, ensure_ascii=False) + "\n")
+                exported += 1
+            cursor = next_cursor(rows, 1000)
+            if cursor is None:
+                break
+    
+    print(f"✅ Exported: {exported} (skipped: {skipped}) → {path}")
+
+
+def load_dataset(path):
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            texts.append(row["text"])
+            labels.append(row["label"])
+    return texts, labels
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Train the category classifier from Supabase listings")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="JSONL dataset path")
+    parser.add_argument("--skip-export", action="store_true", help="Use an existing dataset file")
+    parser.add_argument("--output", default=CATEGORY_MODEL_PATH, help="Model directory")
+    args = parser.parse_args()
+    
+    print("🧠 Category model training")
+    print("=" * 60)
+    
+    if not args.skip_export:
+        try:
+            await export_listings(args.dataset)
+        finally:
+            await close_client()
+    
+    texts, labels = load_dataset(args.dataset)
+    model = NaiveBayesCategoryClassifier.fit(texts, labels)
+    model.save(args.output)
+    print(f"✅ Trained on {len(texts)} listings, {len(model.classes)} classes → {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())